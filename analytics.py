@@ -0,0 +1,222 @@
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+
+from storage import DATA_DIR, parse_timestamp
+
+# Incremental cohort aggregates for the analytics dashboard. Every saved record
+# adds one to a (month, background, gender, score band, career) group, along with
+# running sums of its match score and average score. The dashboard reads only
+# these groups, so it costs the same with 50 records or 5 million. If the table
+# ever drifts from the records (e.g. rows imported with storage.py), rebuild it
+# with `python analytics.py rebuild`.
+
+ANALYTICS_DB = os.path.join(DATA_DIR, 'student_analytics.db')
+# PRAGMA user_version of a fully created (and, if new, backfilled) database
+SCHEMA_VERSION = 1
+
+GROUP_COLUMNS = ['period', 'background', 'gender', 'score_band', 'career']
+SUM_COLUMNS = ['records', 'scored', 'match_score_sum', 'average_score_sum']
+
+# Average-score bands (lower bound inclusive)
+SCORE_BANDS = [(90, '90-100'), (80, '80-89'), (70, '70-79'), (60, '60-69'), (50, '50-59'), (0, '<50')]
+UNKNOWN = 'Unknown'
+
+
+def score_band(average):
+    try:
+        average = float(average)
+    except (TypeError, ValueError):
+        return UNKNOWN
+    for lower, label in SCORE_BANDS:
+        if average >= lower:
+            return label
+    return SCORE_BANDS[-1][1]
+
+
+def _match_score(value):
+    # 'Career Match Score' is stored as e.g. "91.0%", or 'N/A' without a recommendation
+    try:
+        return float(str(value).strip().rstrip('%')) / 100
+    except ValueError:
+        return None
+
+
+def group_key(row):
+    timestamp = parse_timestamp(row.get('Timestamp'))
+    return (
+        timestamp.strftime('%Y-%m') if timestamp else UNKNOWN,
+        row.get('Background') or UNKNOWN,
+        row.get('Gender') or UNKNOWN,
+        score_band(row.get('Average Score')),
+        row.get('Top Career Match') or 'N/A',
+    )
+
+
+def aggregate(rows):
+    # Fold records into {group: [records, scored, match_score_sum, average_score_sum]}
+    groups = defaultdict(lambda: [0, 0, 0.0, 0.0])
+    for row in rows:
+        sums = groups[group_key(row)]
+        sums[0] += 1
+        match = _match_score(row.get('Career Match Score'))
+        if match is not None:
+            sums[1] += 1
+            sums[2] += match
+        try:
+            sums[3] += float(row.get('Average Score'))
+        except (TypeError, ValueError):
+            pass
+    return groups
+
+
+class CohortAnalytics:
+    # Aggregates in a small SQLite table next to the records. Updates are UPSERTs,
+    # so recording a save touches one row whatever the size of the cohort.
+
+    def __init__(self, path=ANALYTICS_DB, backfill_store=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._create_schema(backfill_store)
+
+    def _create_schema(self, backfill_store=None):
+        # One write transaction, marked done by user_version (as in storage.py): when
+        # several workers open a new database at once, only the first backfills it,
+        # and a crash part-way leaves nothing behind, so the next start backfills again
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                if self._conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+                    existed = self._conn.execute("SELECT 1 FROM sqlite_master "
+                                                 "WHERE type = 'table' AND name = 'cohort_aggregates'").fetchone()
+                    self._conn.execute(
+                        'CREATE TABLE IF NOT EXISTS cohort_aggregates ('
+                        'period TEXT, background TEXT, gender TEXT, score_band TEXT, career TEXT, '
+                        'records INTEGER NOT NULL, scored INTEGER NOT NULL, '
+                        'match_score_sum REAL NOT NULL, average_score_sum REAL NOT NULL, '
+                        f'PRIMARY KEY ({", ".join(GROUP_COLUMNS)}))'
+                    )
+                    # Databases from before the marker were backfilled when they were created
+                    if not existed and backfill_store is not None:
+                        self._upsert(self._store_groups(backfill_store))
+                    self._conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def _upsert(self, groups):
+        values = [key + tuple(sums) for key, sums in groups.items()]
+        updates = ', '.join(f'{name} = {name} + excluded.{name}' for name in SUM_COLUMNS)
+        self._conn.executemany(
+            f'INSERT INTO cohort_aggregates ({", ".join(GROUP_COLUMNS + SUM_COLUMNS)}) '
+            f'VALUES ({", ".join("?" for _ in GROUP_COLUMNS + SUM_COLUMNS)}) '
+            f'ON CONFLICT ({", ".join(GROUP_COLUMNS)}) DO UPDATE SET {updates}', values)
+
+    def record_many(self, rows):
+        groups = aggregate(rows)
+        if groups:
+            with self._lock, self._conn:
+                self._upsert(groups)
+
+    def record(self, row):
+        self.record_many([row])
+
+    def _store_groups(self, store, chunk_size=5000):
+        groups = defaultdict(lambda: [0, 0, 0.0, 0.0])
+        for chunk in store.iter_rows(chunk_size):
+            for key, sums in aggregate(chunk).items():
+                total = groups[key]
+                for i, value in enumerate(sums):
+                    total[i] += value
+        return groups
+
+    def rebuild(self, store, chunk_size=5000):
+        # Recompute every group from the record store in one transaction
+        groups = self._store_groups(store, chunk_size)
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM cohort_aggregates')
+            self._upsert(groups)
+        return sum(sums[0] for sums in groups.values())
+
+    def summary(self, by, start_period=None, end_period=None, backgrounds=None):
+        # Totals per (by..., career) over an inclusive 'YYYY-MM' period range
+        by = [column for column in by if column in GROUP_COLUMNS and column != 'career']
+        conditions, params = [], []
+        if start_period:
+            conditions.append('period >= ?')
+            params.append(start_period)
+        if end_period:
+            conditions.append('period <= ?')
+            params.append(end_period)
+        if backgrounds:
+            conditions.append(f'background IN ({", ".join("?" for _ in backgrounds)})')
+            params.extend(backgrounds)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        columns = by + ['career']
+        query = (f'SELECT {", ".join(columns)}, SUM(records), SUM(scored), SUM(match_score_sum), '
+                 f'SUM(average_score_sum) FROM cohort_aggregates {where} '
+                 f'GROUP BY {", ".join(columns)} ORDER BY {", ".join(columns)}')
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        results = []
+        for row in rows:
+            records, scored, match_sum, average_sum = row[len(columns):]
+            result = dict(zip(columns, row))
+            result['records'] = records
+            result['mean_match_score'] = match_sum / scored if scored else None
+            result['mean_average_score'] = average_sum / records if records else None
+            results.append(result)
+        return results
+
+    def periods(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                'SELECT DISTINCT period FROM cohort_aggregates ORDER BY period')]
+
+    def total_records(self):
+        with self._lock:
+            return self._conn.execute('SELECT COALESCE(SUM(records), 0) FROM cohort_aggregates').fetchone()[0]
+
+
+_analytics = None
+_analytics_lock = threading.Lock()
+
+
+def get_analytics():
+    # Process-wide aggregates; created from the existing records the first time
+    global _analytics
+    if _analytics is None:
+        with _analytics_lock:
+            if _analytics is None:
+                from storage import get_store
+                _analytics = CohortAnalytics(backfill_store=get_store())
+    return _analytics
+
+
+def main(argv=None):
+    import argparse
+    from storage import get_store
+
+    parser = argparse.ArgumentParser(description="Cohort analytics aggregates.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('rebuild', help="Recompute the aggregates from every saved record")
+    show = sub.add_parser('show', help="Print career counts per group")
+    show.add_argument('--by', default='background', choices=[c for c in GROUP_COLUMNS if c != 'career'])
+    args = parser.parse_args(argv)
+
+    analytics = get_analytics()
+    if args.command == 'rebuild':
+        print(f"Aggregated {analytics.rebuild(get_store())} records -> {analytics.path}")
+    else:
+        for row in analytics.summary([args.by]):
+            score = f"{row['mean_match_score'] * 100:.1f}%" if row['mean_match_score'] is not None else 'N/A'
+            print(f"{row[args.by]:<20} {row['career']:<25} {row['records']:>8}  mean match {score}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from storage import DATA_DIR, get_store, parse_timestamp
+
+# pyarrow is optional for the app itself; the archive needs it
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    _has_pyarrow = True
+except ImportError:
+    _has_pyarrow = False
+
+# Columnar archive of the student records: a Parquet dataset partitioned as
+# month=YYYY-MM/background=<Background>/, with typed columns instead of the
+# record store's text. compact() copies every record appended since the last
+# run (tracked by a watermark on the store's log position), so it can run from
+# cron as often as needed. The live store is left untouched -- the app's
+# downloads and analytics keep reading it.
+
+ARCHIVE_DIR = os.path.join(DATA_DIR, 'student_archive')
+WATERMARK_FILE = '_watermark.json'
+PARTITION_COLUMNS = ['month', 'background']
+DEFAULT_CHUNK_SIZE = 50000
+
+# Record field -> (archive column, type name)
+ARCHIVE_COLUMNS = [
+    ('Timestamp', 'timestamp', 'timestamp'),
+    ('Name', 'name', 'string'),
+    ('Age', 'age', 'int16'),
+    ('Gender', 'gender', 'string'),
+    ('Part-Time Job', 'part_time_job', 'bool'),
+    ('Extracurricular Activities', 'extracurricular_activities', 'bool'),
+    ('Weekly Study Hours', 'weekly_study_hours', 'int16'),
+    ('Math', 'math', 'int16'),
+    ('History', 'history', 'int16'),
+    ('Physics', 'physics', 'int16'),
+    ('Chemistry', 'chemistry', 'int16'),
+    ('Biology', 'biology', 'int16'),
+    ('English', 'english', 'int16'),
+    ('Geography', 'geography', 'int16'),
+    ('Total Score', 'total_score', 'int16'),
+    ('Average Score', 'average_score', 'float64'),
+    ('Top Career Match', 'top_career_match', 'string'),
+    ('Career Match Score', 'career_match_score', 'float64'),
+]
+
+
+def _require_pyarrow():
+    if not _has_pyarrow:
+        raise RuntimeError("The Parquet archive needs pyarrow: pip install pyarrow")
+
+
+def archive_schema():
+    _require_pyarrow()
+    types = {
+        'timestamp': pa.timestamp('s'), 'string': pa.string(), 'int16': pa.int16(),
+        'bool': pa.bool_(), 'float64': pa.float64(),
+    }
+    fields = [pa.field(column, types[kind]) for _, column, kind in ARCHIVE_COLUMNS]
+    return pa.schema(fields + [pa.field(name, pa.string()) for name in PARTITION_COLUMNS])
+
+
+def partitioning():
+    return ds.partitioning(pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS]), flavor='hive')
+
+
+def _number(value, kind):
+    if value is None or str(value).strip() == '':
+        return None
+    try:
+        number = float(str(value).strip().rstrip('%'))
+    except ValueError:
+        return None
+    return round(number) if kind == 'int16' else number
+
+
+def _flag(value):
+    if value is None or str(value).strip() == '':
+        return None
+    return str(value).strip().lower() in ('yes', 'true', '1', 'y')
+
+
+def to_table(rows):
+    # Typed Arrow table for a chunk of records in the student_records layout
+    columns = {}
+    for field, column, kind in ARCHIVE_COLUMNS:
+        values = [row.get(field) for row in rows]
+        if kind == 'timestamp':
+            columns[column] = [parse_timestamp(value) for value in values]
+        elif kind == 'bool':
+            columns[column] = [_flag(value) for value in values]
+        elif kind == 'string':
+            columns[column] = [None if value in (None, '') else str(value) for value in values]
+        else:
+            columns[column] = [_number(value, kind) for value in values]
+    # "91.00%" is stored as the fraction 0.91, like the model's probabilities
+    columns['career_match_score'] = [None if value is None else value / 100
+                                     for value in columns['career_match_score']]
+    columns['month'] = [ts.strftime('%Y-%m') if ts else 'unknown' for ts in columns['timestamp']]
+    columns['background'] = [row.get('Background') or 'unknown' for row in rows]
+    return pa.table(columns, schema=archive_schema())
+
+
+def read_watermark(path=ARCHIVE_DIR):
+    try:
+        with open(os.path.join(path, WATERMARK_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'position': 0, 'records': 0}
+
+
+def _write_watermark(path, watermark):
+    tmp = os.path.join(path, WATERMARK_FILE + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(watermark, f, indent=2)
+    os.replace(tmp, os.path.join(path, WATERMARK_FILE))
+
+
+def compact(store=None, path=ARCHIVE_DIR, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Append records past the watermark to the dataset, one chunk at a time.
+    # File names are derived from the chunk's first log position, so a run that
+    # dies before moving the watermark is simply overwritten by the next one.
+    _require_pyarrow()
+    store = store or get_store()
+    os.makedirs(path, exist_ok=True)
+    watermark = read_watermark(path)
+    # Log positions are only meaningful for the store that produced them
+    if watermark.get('store') and os.path.abspath(watermark['store']) != os.path.abspath(store.path):
+        raise ValueError(f"Archive {path} was built from {watermark['store']}, not {store.path}")
+    written = 0
+    for position, rows in store.iter_log(watermark['position'], chunk_size):
+        ds.write_dataset(
+            to_table(rows), path, format='parquet', partitioning=partitioning(),
+            basename_template=f"part-{watermark['position'] + 1:012d}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+            file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'),
+        )
+        written += len(rows)
+        watermark = {
+            'position': position,
+            'records': watermark['records'] + len(rows),
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'store': store.path,
+        }
+        _write_watermark(path, watermark)
+    return written
+
+
+def dataset(path=ARCHIVE_DIR):
+    _require_pyarrow()
+    return ds.dataset(path, format='parquet', schema=archive_schema(), partitioning=partitioning(),
+                      exclude_invalid_files=True)
+
+
+def record_filter(start=None, end=None, backgrounds=None):
+    # Inclusive date range and backgrounds as a dataset expression; the month and
+    # background parts prune whole partitions before any file is opened
+    conditions = []
+    if start:
+        conditions.append(ds.field('month') >= start.strftime('%Y-%m'))
+        conditions.append(ds.field('timestamp') >= pa.scalar(datetime.combine(start, datetime.min.time()),
+                                                             pa.timestamp('s')))
+    if end:
+        conditions.append(ds.field('month') <= end.strftime('%Y-%m'))
+        conditions.append(ds.field('timestamp') < pa.scalar(datetime.combine(end + timedelta(days=1),
+                                                                             datetime.min.time()),
+                                                            pa.timestamp('s')))
+    if backgrounds:
+        conditions.append(ds.field('background').isin(list(backgrounds)))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_archive(columns=None, start=None, end=None, backgrounds=None, filter=None, path=ARCHIVE_DIR):
+    # Only the requested columns are decoded, and only from partitions and row
+    # groups that can match; `filter` may add any pyarrow.dataset expression
+    if not os.path.isdir(path):
+        return archive_schema().empty_table().select(columns) if columns else archive_schema().empty_table()
+    expression = record_filter(start, end, backgrounds)
+    if filter is not None:
+        expression = filter if expression is None else expression & filter
+    return dataset(path).to_table(columns=columns, filter=expression)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact student records into a partitioned Parquet archive.")
+    parser.add_argument('--path', default=ARCHIVE_DIR, help="Archive directory")
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('compact', help="Append records saved since the last run")
+    run.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    run.add_argument('--every', type=float, help="Keep running, compacting every N seconds")
+    query = sub.add_parser('query', help="Count archived records per month and background")
+    query.add_argument('--start', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date())
+    query.add_argument('--end', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date())
+    query.add_argument('--background', action='append', dest='backgrounds')
+    args = parser.parse_args(argv)
+
+    if args.command == 'compact':
+        while True:
+            written = compact(path=args.path, chunk_size=args.chunk_size)
+            watermark = read_watermark(args.path)
+            print(f"Archived {written} new records ({watermark['records']} total) -> {args.path}")
+            if not args.every:
+                return 0
+            time.sleep(args.every)
+
+    table = read_archive(['month', 'background'], args.start, args.end, args.backgrounds, path=args.path)
+    counts = table.group_by(['month', 'background']).aggregate([('month', 'count')]).sort_by(
+        [('month', 'ascending'), ('background', 'ascending')])
+    for row in counts.to_pylist():
+        print(f"{row['month']}  {row['background']:<20} {row['month_count']:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
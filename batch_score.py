@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from model_registry import BACKEND_FILES, MODEL_BACKEND, MODEL_DIR, ModelRegistry
+from ranking import predict_ranking
+from recommender import build_feature_matrix, detect_schema
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def _iter_chunks(data, chunk_size):
+    # Accept a DataFrame, a CSV path or an iterator of DataFrames
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, len(data), chunk_size):
+            yield data.iloc[start:start + chunk_size]
+    elif isinstance(data, (str, os.PathLike)):
+        yield from pd.read_csv(data, chunksize=chunk_size)
+    else:
+        yield from data
+
+
+def score_chunks(data, scaler, model, k=3, chunk_size=DEFAULT_CHUNK_SIZE, min_probability=0.0):
+    # Score every student in `data`, one chunk at a time, so memory stays bounded
+    # by chunk_size no matter how large the cohort is. Careers below min_probability
+    # are left blank.
+    schema = None
+    for chunk in _iter_chunks(data, chunk_size):
+        schema = schema or detect_schema(chunk.columns)
+        required = [schema['gender'], schema['part_time_job'], schema['extracurricular_activities'],
+                    schema['weekly_self_study_hours']] + schema['subjects']
+        # Skip blank or incomplete rows (student_records.csv has empty ",,,," lines)
+        chunk = chunk.dropna(subset=required)
+        if chunk.empty:
+            continue
+
+        X = build_feature_matrix(chunk, schema)
+        ranking = predict_ranking(X, scaler, model, k, min_probability)
+        careers = ranking.careers()
+
+        result = chunk.copy()
+        for rank in range(ranking.k):
+            result[f'Career {rank + 1}'] = careers[:, rank]
+            result[f'Career {rank + 1} Score'] = ranking.probabilities[:, rank]
+        yield result
+
+
+def score_frame(data, scaler, model, k=3, chunk_size=DEFAULT_CHUNK_SIZE, min_probability=0.0):
+    chunks = list(score_chunks(data, scaler, model, k, chunk_size, min_probability))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks)
+
+
+def score_csv(input_path, output_path, scaler, model, k=3, chunk_size=DEFAULT_CHUNK_SIZE, min_probability=0.0):
+    # Stream results straight to disk, writing the header with the first chunk
+    rows = 0
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        for i, chunk in enumerate(score_chunks(input_path, scaler, model, k, chunk_size, min_probability)):
+            chunk.to_csv(f, header=(i == 0), index=False)
+            rows += len(chunk)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a whole cohort of students in one pass.")
+    parser.add_argument('input', help="CSV in the student-scores.csv or student_records.csv schema")
+    parser.add_argument('-o', '--output', default='recommendations.csv', help="Output CSV path")
+    parser.add_argument('-k', '--top-k', type=int, default=3, help="Number of careers per student")
+    parser.add_argument('--min-probability', type=float, default=0.0,
+                        help="Leave careers below this probability blank")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows scored per chunk")
+    parser.add_argument('--model-dir', default=MODEL_DIR, help="Directory holding the model artifacts")
+    parser.add_argument('--backend', choices=list(BACKEND_FILES), default=MODEL_BACKEND,
+                        help="Model format to load (see model_registry.py)")
+    args = parser.parse_args(argv)
+
+    scaler, model = ModelRegistry(args.model_dir, args.backend).get()
+
+    rows = score_csv(args.input, args.output, scaler, model, args.top_k, args.chunk_size, args.min_probability)
+    print(f"Scored {rows} students -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
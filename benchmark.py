@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from model_registry import BACKEND_FILES, MODEL_BACKEND, MODEL_DIR, ModelRegistry
+from ranking import predict_ranking
+from recommender import SUBJECT_KEYS, SCORES_SCHEMA, build_feature_matrix, class_names, encode_student
+from storage import CsvRecordStore, SqliteRecordStore, build_record
+
+# Measures the prediction and persistence hot paths and writes the numbers as JSON,
+# so runs can be compared between commits (--compare) and after a model is retrained.
+
+BATCH_SIZES = [1, 10, 100, 1000, 10000]
+SAVE_CHECKPOINTS = [0, 1000, 5000, 20000]
+
+
+def synthetic_students(n, seed=0):
+    # Rows in the student-scores.csv schema, with distributions close to the training data
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'first_name': 'Student',
+        'last_name': [f'{i:06d}' for i in range(n)],
+        'email': [f'student.{i}@example.com' for i in range(n)],
+        'gender': rng.choice(['male', 'female'], size=n),
+        'part_time_job': rng.random(n) < 0.16,
+        'extracurricular_activities': rng.random(n) < 0.2,
+        'weekly_self_study_hours': rng.integers(0, 51, size=n),
+        'career_aspiration': rng.choice(class_names, size=n),
+    })
+    for column in SCORES_SCHEMA['subjects']:
+        df[column] = np.clip(rng.normal(81, 10, size=n).round(), 40, 100).astype(int)
+    return df
+
+
+def _percentiles(timings):
+    timings = np.asarray(timings) * 1000.0
+    return {
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'p99_ms': float(np.percentile(timings, 99)),
+        'mean_ms': float(timings.mean()),
+    }
+
+
+def _student_args(row):
+    scores = {key: row[f'{key}_score'] for key in SUBJECT_KEYS}
+    scores['total'] = sum(scores.values())
+    scores['average'] = scores['total'] / len(SUBJECT_KEYS)
+    return (row['gender'], row['part_time_job'], row['extracurricular_activities'],
+            row['weekly_self_study_hours'], scores)
+
+
+def bench_single_row(scaler, model, students, repeats):
+    # The Recommendations() path: encode one student, scale, predict, rank
+    rows = [_student_args(row) for row in students.head(repeats).to_dict('records')]
+    predict_ranking(encode_student(*rows[0]), scaler, model)
+    timings, transform_timings = [], []
+    for args in rows:
+        start = time.perf_counter()
+        X = encode_student(*args)
+        predict_ranking(X, scaler, model)
+        timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        scaler.transform(X)
+        transform_timings.append(time.perf_counter() - start)
+    return {'recommendations': _percentiles(timings), 'scaler_transform': _percentiles(transform_timings)}
+
+
+def bench_batches(scaler, model, students, batch_sizes, min_seconds=0.5):
+    results = {}
+    for size in batch_sizes:
+        batch = students.head(size)
+        calls, rows, start = 0, 0, time.perf_counter()
+        while True:
+            predict_ranking(build_feature_matrix(batch, SCORES_SCHEMA), scaler, model)
+            calls += 1
+            rows += len(batch)
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds and calls >= 3:
+                break
+        results[str(size)] = {'rows_per_second': rows / elapsed, 'ms_per_batch': elapsed / calls * 1000.0}
+    return results
+
+
+def bench_model_load(model_dir, backend, repeats=3):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        ModelRegistry(model_dir, backend).get()
+        timings.append(time.perf_counter() - start)
+    return {'min_seconds': min(timings), 'median_seconds': float(np.median(timings))}
+
+
+def bench_saves(store_factory, checkpoints, batch=200):
+    # Saves/second measured at each checkpoint while the store grows to the next one
+    students = synthetic_students(batch, seed=1)
+    records = []
+    for row in students.to_dict('records'):
+        scores_dict = {key: row[f'{key}_score'] for key in SUBJECT_KEYS}
+        scores_dict['total'] = sum(scores_dict.values())
+        scores_dict['average'] = scores_dict['total'] / len(SUBJECT_KEYS)
+        records.append(build_record(row['last_name'], 20, row['gender'].title(), 'ICS', row['part_time_job'],
+                                    row['extracurricular_activities'], row['weekly_self_study_hours'],
+                                    scores_dict, [(row['career_aspiration'], 0.5)]))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = store_factory(tmp)
+        size = 0
+        for checkpoint in checkpoints:
+            while size < checkpoint:
+                store.append_many(records)
+                size += len(records)
+            start = time.perf_counter()
+            for record in records:
+                store.append(record)
+            elapsed = time.perf_counter() - start
+            size += len(records)
+            results[str(checkpoint)] = {'saves_per_second': len(records) / elapsed,
+                                        'ms_per_save': elapsed / len(records) * 1000.0}
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}.{key}' if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(current, previous, threshold):
+    # Latency-like metrics regress when they grow; throughput metrics when they shrink
+    regressions = []
+    old = _flatten(previous['results'])
+    for name, value in _flatten(current['results']).items():
+        if name not in old or not old[name]:
+            continue
+        change = (value - old[name]) / old[name]
+        higher_is_better = name.endswith(('per_second',))
+        worse = -change if higher_is_better else change
+        flag = ' REGRESSION' if worse > threshold else ''
+        print(f"  {name:<55} {old[name]:>12.4f} -> {value:>12.4f} ({change * 100:+.1f}%){flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark prediction latency, throughput and record saves.")
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--backend', choices=list(BACKEND_FILES), default=MODEL_BACKEND)
+    parser.add_argument('--repeats', type=int, default=500, help="Single-row predictions to time")
+    parser.add_argument('--batch-sizes', type=lambda s: [int(x) for x in s.split(',')], default=BATCH_SIZES)
+    parser.add_argument('--save-checkpoints', type=lambda s: [int(x) for x in s.split(',')], default=SAVE_CHECKPOINTS)
+    parser.add_argument('--skip-saves', action='store_true')
+    parser.add_argument('-o', '--output', default='benchmark.json')
+    parser.add_argument('--compare', help="Previous benchmark JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Relative change that counts as a regression")
+    args = parser.parse_args(argv)
+
+    print(f"Loading model ({args.backend}) from {args.model_dir}...")
+    results = {'model_load': bench_model_load(args.model_dir, args.backend)}
+    scaler, model = ModelRegistry(args.model_dir, args.backend).get()
+
+    students = synthetic_students(max(max(args.batch_sizes), args.repeats))
+    print("Timing single-row predictions...")
+    results['single_row'] = bench_single_row(scaler, model, students, args.repeats)
+    print("Timing batch predictions...")
+    results['batch'] = bench_batches(scaler, model, students, args.batch_sizes)
+    if not args.skip_saves:
+        print("Timing record saves...")
+        results['save'] = {
+            'csv': bench_saves(lambda d: CsvRecordStore(os.path.join(d, 'records.csv')), args.save_checkpoints),
+            'sqlite': bench_saves(lambda d: SqliteRecordStore(os.path.join(d, 'records.db'), legacy_csv=None),
+                                  args.save_checkpoints),
+        }
+
+    manifest_path = os.path.join(args.model_dir, 'manifest.json')
+    manifest = None
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = {key: value for key, value in json.load(f).items() if key in ('created', 'model', 'params')}
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'backend': args.backend,
+            'model_manifest': manifest,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    single = results['single_row']['recommendations']
+    print(f"Single row: p50 {single['p50_ms']:.3f} ms  p95 {single['p95_ms']:.3f} ms  p99 {single['p99_ms']:.3f} ms")
+    for size, batch in results['batch'].items():
+        print(f"Batch {size:>6}: {batch['rows_per_second']:>12,.0f} rows/s")
+    print(f"Model load: {results['model_load']['min_seconds']:.3f} s")
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        print(f"\nComparison with {args.compare}:")
+        regressions = compare(report, previous, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metrics regressed by more than {args.threshold * 100:.0f}%", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Server CPU per completed recommendation: the step-by-step wizard vs the
+# express form. Each simulated student is a fresh Streamlit session driven by
+# streamlit.testing's AppTest in this process, from the first page to the
+# results, entering the same answers in both modes. AppTest runs the script the
+# way the server does, so process CPU time covers script runs, widget state and
+# building the page messages; it does not include the WebSocket itself, which
+# the script-run count stands in for (one round-trip each).
+
+os.environ.setdefault('CAREERPATH_PRELOAD', '0')
+
+
+class _NoScriptRunContextWarning(logging.Filter):
+    # AppTest warns about the missing ScriptRunContext on every run. A filter,
+    # because Streamlit resets the logger's level when it first creates it.
+    def filter(self, record):
+        return 'missing ScriptRunContext' not in record.getMessage()
+
+
+logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').addFilter(_NoScriptRunContextWarning())
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def student(rng, subjects):
+    return {
+        'name': f'Student {rng.randrange(10000)}',
+        'study_hours': rng.randrange(0, 30),
+        'scores': {subject: rng.randrange(40, 101) for subject in subjects},
+    }
+
+
+def run_wizard(at, answers):
+    at.run()
+    at.text_input(key='input_name').input(answers['name']).run()
+    for step in range(1, 7):
+        at.button(key=f'next_{step}').click().run()
+    at.slider(key='input_study_hours').set_value(answers['study_hours']).run()
+    at.button(key='next_7').click().run()
+    for subject, score in answers['scores'].items():
+        at.slider(key=f'score_{subject}').set_value(score).run()
+    at.button(key='submit').click().run()
+
+
+def run_express(at, answers):
+    at.query_params['mode'] = 'express'
+    at.run()
+    # Form widgets only reach the server with the submit
+    at.text_input(key='express_name').input(answers['name'])
+    at.slider(key='express_study_hours').set_value(answers['study_hours'])
+    for subject, score in answers['scores'].items():
+        at.slider(key=f'express_score_{subject}').set_value(score)
+    at.button[0].click().run()
+
+
+MODES = {'wizard': run_wizard, 'express': run_express}
+
+
+def complete(app, mode, answers, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app, default_timeout=timeout)
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    MODES[mode](at, answers)
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    if at.exception or not any(h.value.startswith('🎯') for h in at.header):
+        raise RuntimeError(f"{mode}: did not reach the results page "
+                           f"({[e.value for e in at.exception] or [h.value for h in at.header]})")
+    pages = [row for row in at.session_state['_stage_metrics'].summary() if row['stage'].startswith('page.')]
+    return {
+        'cpu_ms': cpu * 1000.0,
+        'wall_ms': wall * 1000.0,
+        'script_runs': sum(row['count'] for row in pages),
+        'script_ms': sum(row['total_s'] for row in pages) * 1000.0,
+    }
+
+
+def summarize(results):
+    return {key: statistics.median(r[key] for r in results) for key in results[0]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare server CPU per recommendation: wizard vs express form.")
+    parser.add_argument('--app', default=os.path.join(HERE, 'app.py'))
+    parser.add_argument('--students', type=int, default=20, help="Completed recommendations per mode")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--json', help="Also write the report as JSON")
+    parser.add_argument('--data-dir', help="CAREERPATH_DATA_DIR for the app (default: a temp dir)")
+    args = parser.parse_args(argv)
+
+    # Keep the benchmark's sessions and records away from the install's data
+    os.environ['CAREERPATH_DATA_DIR'] = args.data_dir or tempfile.mkdtemp(prefix='careerpath-modes-')
+
+    sys.path.insert(0, HERE)
+    from subjects import MODEL_SUBJECTS, subjects_by_background
+    # app_new.py asks for the default background's subjects
+    subjects = subjects_by_background['Pre-Medical'] if 'app_new' in os.path.basename(args.app) else MODEL_SUBJECTS
+
+    rng = random.Random(args.seed)
+    answers = [student(rng, subjects) for _ in range(args.students)]
+    # Warm-up: imports, model load and the prediction cache's first misses are not per-student costs
+    for mode in MODES:
+        complete(args.app, mode, student(rng, subjects), args.timeout)
+
+    report = {'app': os.path.basename(args.app), 'students': args.students}
+    results = {mode: [] for mode in MODES}
+    # Interleaved, so drift in machine load hits both modes alike
+    for a in answers:
+        for mode in MODES:
+            results[mode].append(complete(args.app, mode, a, args.timeout))
+    for mode in MODES:
+        report[mode] = summarize(results[mode])
+
+    print(f"Median per completed recommendation ({args.students} students, {report['app']}):")
+    print(f"{'mode':<10}{'CPU ms':>10}{'wall ms':>10}{'script runs':>13}{'in-script ms':>14}")
+    for mode in MODES:
+        r = report[mode]
+        print(f"{mode:<10}{r['cpu_ms']:>10.1f}{r['wall_ms']:>10.1f}{r['script_runs']:>13.0f}{r['script_ms']:>14.1f}")
+    report['cpu_ratio'] = report['wizard']['cpu_ms'] / report['express']['cpu_ms']
+    print(f"Express uses {report['cpu_ratio']:.1f}x less CPU per recommendation")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
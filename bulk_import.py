@@ -0,0 +1,311 @@
+import argparse
+import csv
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from recommender import SCORES_SCHEMA, SUBJECT_KEYS, build_feature_matrix, class_names
+from storage import build_record
+from subject_mapping import map_frame, plain_number, subject_key, subjects_by_background
+
+# XLSX support is optional; CSV only needs pandas
+try:
+    import openpyxl
+    _has_openpyxl = True
+except ImportError:
+    _has_openpyxl = False
+
+# Bulk import of school score sheets. Rows are streamed from a CSV or XLSX file
+# in chunks, validated against the same bounds as the wizard widgets, mapped
+# from background-specific subjects to the model features, scored as one
+# matrix per chunk and saved with a single append_many() per chunk. ImportJob
+# runs all of this in a background thread and exposes its progress.
+
+DEFAULT_CHUNK_SIZE = 2000
+MAX_REJECTS_KEPT = 1000
+
+# Same limits as the wizard: age number_input, study-hours slider, score sliders
+AGE_RANGE = (10, 100)
+STUDY_HOURS_RANGE = (0, 100)
+SCORE_RANGE = (0, 100)
+
+# Sheet column (after subject_key normalisation) -> import field
+COLUMN_ALIASES = {
+    'part-time_job': 'part_time_job',
+    'weekly_self_study_hours': 'weekly_study_hours',
+    'study_hours': 'weekly_study_hours',
+}
+BASE_COLUMNS = ['name', 'age', 'gender', 'background', 'part_time_job', 'extracurricular_activities',
+                'weekly_study_hours']
+SUBJECT_COLUMNS = sorted({subject_key(subject) for subjects in subjects_by_background.values()
+                          for subject in subjects})
+_FLAGS = {'yes': True, 'y': True, 'true': True, '1': True, 'no': False, 'n': False, 'false': False, '0': False, '': False}
+
+
+def available_extensions():
+    return ['csv', 'xlsx'] if _has_openpyxl else ['csv']
+
+
+def _normalize_columns(df):
+    columns = {column: subject_key(str(column).strip()) for column in df.columns}
+    columns = {column: COLUMN_ALIASES.get(key, key) for column, key in columns.items()}
+    return df.rename(columns=columns)
+
+
+class _Progress:
+    # Fraction of the input consumed so far, for files read in chunks
+    def __init__(self):
+        self.fraction = 0.0
+
+
+def _csv_chunks(path, chunk_size, progress):
+    size = os.path.getsize(path) or 1
+    with open(path, 'rb') as f:
+        for chunk in pd.read_csv(f, chunksize=chunk_size, dtype=str, keep_default_na=False):
+            # The parser reads ahead, so the file position is a close upper bound
+            progress.fraction = min(f.tell() / size, 1.0)
+            yield chunk
+    progress.fraction = 1.0
+
+
+def _xlsx_chunks(path, chunk_size, progress):
+    if not _has_openpyxl:
+        raise RuntimeError("XLSX import needs openpyxl: pip install openpyxl (or save the sheet as CSV)")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(value) if value is not None else '' for value in next(rows, [])]
+        total = max((sheet.max_row or 1) - 1, 1)
+        done, batch = 0, []
+        for row in rows:
+            batch.append(['' if value is None else str(value) for value in row])
+            if len(batch) >= chunk_size:
+                done += len(batch)
+                progress.fraction = min(done / total, 1.0)
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+        progress.fraction = 1.0
+    finally:
+        workbook.close()
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    progress = progress or _Progress()
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        return _xlsx_chunks(path, chunk_size, progress)
+    return _csv_chunks(path, chunk_size, progress)
+
+
+def _in_range(values, bounds):
+    numbers = pd.to_numeric(values, errors='coerce')
+    return numbers, numbers.between(*bounds)
+
+
+def validate_chunk(df):
+    # Returns (clean rows with typed columns, [(row index, reason), ...]). Every check
+    # is a vectorised mask; a row is rejected with all of its problems listed.
+    df = _normalize_columns(df)
+    missing = [column for column in BASE_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    df = df.copy()
+    errors = pd.Series('', index=df.index)
+
+    def reject(mask, message):
+        errors[mask] = errors[mask] + message + '; '
+
+    df['name'] = df['name'].astype(str).str.strip()
+    reject(df['name'] == '', "name is empty")
+    df['age'], ok = _in_range(df['age'], AGE_RANGE)
+    reject(~ok, f"age must be {AGE_RANGE[0]}-{AGE_RANGE[1]}")
+    df['gender'] = df['gender'].astype(str).str.strip().str.title()
+    reject(~df['gender'].isin(['Male', 'Female']), "gender must be Male or Female")
+    df['background'] = df['background'].astype(str).str.strip()
+    reject(~df['background'].isin(list(subjects_by_background)),
+           f"background must be one of {', '.join(subjects_by_background)}")
+    for column in ('part_time_job', 'extracurricular_activities'):
+        values = df[column].astype(str).str.strip().str.lower()
+        reject(~values.isin(list(_FLAGS)), f"{column} must be Yes or No")
+        df[column] = values.map(_FLAGS).fillna(False).astype(bool)
+    df['weekly_study_hours'], ok = _in_range(df['weekly_study_hours'], STUDY_HOURS_RANGE)
+    reject(~ok, f"weekly_study_hours must be {STUDY_HOURS_RANGE[0]}-{STUDY_HOURS_RANGE[1]}")
+
+    # A subject is only required for rows whose background studies it
+    for column in SUBJECT_COLUMNS:
+        needed = df['background'].isin([background for background, subjects in subjects_by_background.items()
+                                        if column in map(subject_key, subjects)])
+        if column not in df.columns:
+            reject(needed, f"{column} is missing")
+            df[column] = np.nan
+            continue
+        df[column], ok = _in_range(df[column], SCORE_RANGE)
+        reject(needed & ~ok, f"{column} must be {SCORE_RANGE[0]}-{SCORE_RANGE[1]}")
+
+    bad = errors != ''
+    rejects = list(zip(df.index[bad], errors[bad].str.rstrip('; ')))
+    return df[~bad], rejects
+
+
+def feature_frame(df):
+    # Validated rows -> the student-scores.csv layout build_feature_matrix expects
+    frame = pd.DataFrame({
+        'gender': df['gender'].str.lower().to_numpy(),
+        'part_time_job': df['part_time_job'].to_numpy(),
+        'extracurricular_activities': df['extracurricular_activities'].to_numpy(),
+        'weekly_self_study_hours': df['weekly_study_hours'].to_numpy(),
+    })
+    frame[SCORES_SCHEMA['subjects']] = map_frame(df)
+    return frame
+
+
+def score_chunk(df, scaler, model):
+    # One predict_proba call for the whole chunk; returns (features, best class, probability)
+    X = build_feature_matrix(feature_frame(df), SCORES_SCHEMA)
+    probabilities = model.predict_proba(scaler.transform(X))
+    best = probabilities.argmax(axis=1)
+    return X, best, probabilities[np.arange(len(best)), best]
+
+
+def build_records(df, X, best, best_probability):
+    records = []
+    columns = zip(df['name'], df['age'], df['gender'], df['background'], df['part_time_job'],
+                  df['extracurricular_activities'], df['weekly_study_hours'], X, best, best_probability)
+    for name, age, gender, background, part_time, extra, hours, features, idx, probability in columns:
+        scores_dict = {key: plain_number(value) for key, value in zip(SUBJECT_KEYS, features[4:11].tolist())}
+        scores_dict['total'] = plain_number(features[11])
+        scores_dict['average'] = float(features[12])
+        records.append(build_record(name, int(age), gender, background, part_time, extra, int(hours),
+                                    scores_dict, [(class_names[idx], float(probability))]))
+    return records
+
+
+class ImportJob:
+    # One bulk import, run synchronously with run() or in a daemon thread with
+    # start(). Counters and state are plain attributes the UI can poll.
+
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE, store=None, analytics=None, registry=None,
+                 dry_run=False, remove_file=False):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.store = store
+        self.analytics = analytics
+        self.registry = registry
+        self.dry_run = dry_run
+        self.remove_file = remove_file
+        self.state = 'pending'
+        self.error = None
+        self.rows_read = 0
+        self.imported = 0
+        self.rejected = 0
+        self.rejects = []
+        self.started = None
+        self.finished = None
+        self._progress = _Progress()
+        self._cancel = threading.Event()
+        self._thread = None
+
+    @property
+    def progress(self):
+        return 1.0 if self.state == 'done' else self._progress.fraction
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name='bulk-import', daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def join(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    def run(self):
+        from analytics import get_analytics
+        from model_registry import get_registry
+        from storage import get_store
+
+        self.state = 'running'
+        self.started = time.perf_counter()
+        try:
+            store = self.store or get_store()
+            analytics = self.analytics or (None if self.dry_run else get_analytics())
+            scaler, model = (self.registry or get_registry()).get()
+            for chunk in read_chunks(self.path, self.chunk_size, self._progress):
+                if self._cancel.is_set():
+                    self.state = 'cancelled'
+                    return
+                # Row numbers as they appear in the sheet (header is line 1)
+                chunk.index = np.arange(self.rows_read + 2, self.rows_read + 2 + len(chunk))
+                self.rows_read += len(chunk)
+                valid, rejects = validate_chunk(chunk)
+                self.rejected += len(rejects)
+                self.rejects.extend(rejects[:MAX_REJECTS_KEPT - len(self.rejects)])
+                if valid.empty:
+                    continue
+                records = build_records(valid, *score_chunk(valid, scaler, model))
+                if not self.dry_run:
+                    store.append_many(records)
+                    analytics.record_many(records)
+                self.imported += len(records)
+            self.state = 'done'
+        except Exception as e:
+            self.error = str(e)
+            self.state = 'failed'
+        finally:
+            self.finished = time.perf_counter()
+            if self.remove_file:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+
+
+def write_rejects(f, rejects):
+    writer = csv.writer(f)
+    writer.writerow(['Row', 'Problems'])
+    writer.writerows(rejects)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a school score sheet (CSV or XLSX) and save predictions.")
+    parser.add_argument('input', help="Sheet with Name, Age, Gender, Background, Part-Time Job, "
+                                      "Extracurricular Activities, Weekly Study Hours and subject columns")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--rejects', help="Write rejected rows and their problems to this CSV")
+    parser.add_argument('--dry-run', action='store_true', help="Validate and score without saving")
+    args = parser.parse_args(argv)
+
+    job = ImportJob(args.input, args.chunk_size, dry_run=args.dry_run).start()
+    while job.state in ('pending', 'running'):
+        job.join(0.5)
+        print(f"\r{job.progress * 100:5.1f}%  {job.rows_read} rows read, {job.imported} imported, "
+              f"{job.rejected} rejected", end='', flush=True)
+    print()
+    if job.state == 'failed':
+        print(f"Import failed: {job.error}", file=sys.stderr)
+        return 1
+    if args.rejects and job.rejects:
+        with open(args.rejects, 'w', newline='', encoding='utf-8') as f:
+            write_rejects(f, job.rejects)
+        print(f"Rejected rows written to {args.rejects}")
+    action = "Validated" if args.dry_run else "Imported"
+    print(f"{action} {job.imported} students in {job.elapsed:.1f}s ({job.rejected} rejected)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
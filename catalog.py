@@ -0,0 +1,113 @@
+import functools
+import json
+import os
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+# Versioned reference data: the model's career classes and, per background, the
+# bachelor programs, related careers and the subjects asked for in step 8. It
+# lives in catalog.json so it can be edited without touching code, and is
+# loaded once per process into read-only structures (restart the app after an
+# edit). class_names must stay in the order of the model's predict_proba columns.
+
+CATALOG_PATH = os.environ.get('CAREERPATH_CATALOG',
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog.json'))
+CATALOG_VERSION = 1
+
+
+@dataclass(frozen=True, slots=True)
+class Background:
+    name: str
+    title: str
+    programs: tuple
+    careers: tuple
+    subjects: tuple
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Catalog:
+    version: int
+    class_names: tuple
+    # name -> Background, in the order the wizard lists them
+    backgrounds: MappingProxyType
+    # career -> names of the backgrounds that lead to it
+    backgrounds_by_career: MappingProxyType
+
+
+def _strings(value, what):
+    if not isinstance(value, list) or not value or not all(isinstance(v, str) and v for v in value):
+        raise ValueError(f"Catalog {what} must be a non-empty list of strings")
+    if len(set(value)) != len(value):
+        raise ValueError(f"Catalog {what} has duplicates")
+    return tuple(value)
+
+
+def load_catalog(path=CATALOG_PATH):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != CATALOG_VERSION:
+        raise ValueError(f"{path} is catalog version {data.get('version')}, expected {CATALOG_VERSION}")
+
+    backgrounds = {}
+    by_career = {}
+    for entry in data['backgrounds']:
+        name = entry['name']
+        if name in backgrounds:
+            raise ValueError(f"Catalog background listed twice: {name}")
+        background = Background(name, entry['title'],
+                                _strings(entry['programs'], f'{name} programs'),
+                                _strings(entry['careers'], f'{name} careers'),
+                                _strings(entry['subjects'], f'{name} subjects'))
+        backgrounds[name] = background
+        for career in background.careers:
+            by_career.setdefault(career, []).append(name)
+    return Catalog(data['version'], _strings(data['class_names'], 'class_names'),
+                   MappingProxyType(backgrounds),
+                   MappingProxyType({career: tuple(names) for career, names in by_career.items()}))
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    # Process-wide catalog, read from CAREERPATH_CATALOG (catalog.json by default)
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = load_catalog()
+    return _catalog
+
+
+@functools.lru_cache(maxsize=None)
+def programs_markdown(background):
+    # Step 9's program list as one markdown element, built once per background
+    rec = get_catalog().backgrounds[background]
+    lines = [f"## {rec.title}", "**Recommended Bachelor Programs:**"]
+    lines += [f"**{i}. {program}**" for i, program in enumerate(rec.programs, 1)]
+    return '\n\n'.join(lines)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate and summarise the career catalog.")
+    parser.add_argument('path', nargs='?', default=CATALOG_PATH)
+    args = parser.parse_args(argv)
+
+    try:
+        catalog = load_catalog(args.path)
+    except (OSError, KeyError, TypeError, ValueError) as e:
+        print(f"Invalid catalog {args.path}: {e!r}")
+        return 1
+    print(f"{args.path}: version {catalog.version}, {len(catalog.class_names)} model careers")
+    for background in catalog.backgrounds.values():
+        print(f"  {background.name:<16}{len(background.programs):>3} programs"
+              f"{len(background.careers):>4} careers{len(background.subjects):>3} subjects")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
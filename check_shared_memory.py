@@ -0,0 +1,97 @@
+import argparse
+import multiprocessing as mp
+import os
+import sys
+
+import numpy as np
+
+from model_registry import MODEL_DIR
+
+# Spawns worker processes that each load the forest and touch every page, then
+# compares their memory with a single worker. With memory-mapped .npy arrays the
+# workers share one copy through the page cache, so the total proportional set
+# size (PSS) of N workers should stay close to that of one worker.
+
+METRICS = ('Rss', 'Pss', 'Anonymous')
+
+
+def _memory():
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return values
+
+
+def _worker(model_path, mmap_mode, barrier, results):
+    from fast_forest import load_model
+
+    rng = np.random.default_rng(os.getpid())
+    X = rng.integers(0, 101, size=(256, 13)).astype(np.float64)
+    before = _memory()
+
+    scaler, forest = load_model(model_path, mmap_mode)
+    forest.predict_proba(scaler.transform(X))
+    # Read every array once, as a long-running worker eventually would
+    for array in (forest.feature, forest.threshold, forest.children, forest.value):
+        float(np.asarray(array).sum())
+
+    # Measure only once every worker has the model resident at the same time
+    barrier.wait()
+    after = _memory()
+    results.put({key: after[key] - before[key] for key in METRICS})
+    barrier.wait()
+
+
+def measure(model_path, n_workers, mmap_mode):
+    ctx = mp.get_context('spawn')
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(model_path, mmap_mode, barrier, results))
+             for _ in range(n_workers)]
+    for proc in procs:
+        proc.start()
+    deltas = [results.get(timeout=300) for _ in procs]
+    for proc in procs:
+        proc.join()
+    return {key: sum(d[key] for d in deltas) / n_workers for key in METRICS}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that worker processes share the memory-mapped model.")
+    parser.add_argument('--model', default=os.path.join(MODEL_DIR, 'forest'),
+                        help="forest/ directory written by resave_models.py or export_forest.py --layout npy")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help="Allowed ratio of total PSS for N workers vs one worker")
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile('/proc/self/smaps_rollup'):
+        print("Skipping: /proc/self/smaps_rollup is not available on this platform")
+        return 0
+    if not os.path.isdir(args.model):
+        raise SystemExit(f"Model directory not found: {args.model}")
+
+    report = {}
+    for label, mmap_mode in (('mmap', 'r'), ('in-memory', None)):
+        for n in (1, args.workers):
+            report[label, n] = measure(args.model, n, mmap_mode)
+            m = report[label, n]
+            print(f"{label:>9} x{n}: per-worker RSS {m['Rss'] / 1024:7.1f} MB  "
+                  f"PSS {m['Pss'] / 1024:7.1f} MB  anonymous {m['Anonymous'] / 1024:7.1f} MB")
+
+    single = report['mmap', 1]['Pss']
+    total = report['mmap', args.workers]['Pss'] * args.workers
+    ratio = total / single if single else float('inf')
+    print(f"Total PSS with {args.workers} mmap workers is {ratio:.2f}x one worker")
+    if ratio > args.tolerance:
+        print(f"FAIL: expected at most {args.tolerance:.2f}x", file=sys.stderr)
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Cold-start report for the Streamlit apps. Imports each app in fresh
+# interpreters under `python -X importtime`, and fails (exit 1) when the median
+# import time goes over the budget or a heavy module is imported at startup.
+# Those modules (NumPy, pandas, sklearn, the model) belong to the results step
+# and model_registry.preload(); a new worker should only pay for Streamlit.
+
+APPS = ('app', 'app_new')
+HEAVY_MODULES = ('numpy', 'pandas', 'sklearn', 'joblib', 'scipy', 'pyarrow')
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def import_times(module):
+    # {module: (self_us, cumulative_us)} for one cold `import module`
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=HERE, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times.setdefault(name.strip(), (int(self_us), int(cumulative_us)))
+    return times
+
+
+def measure(module, repeats):
+    runs = [import_times(module) for _ in range(repeats)]
+    totals = [run[module][1] for run in runs]
+    # Report the run closest to the median, so the breakdown adds up to the total
+    median = statistics.median(totals)
+    run = min(runs, key=lambda r: abs(r[module][1] - median))
+    top = [name for name in run if '.' not in name and name != module]
+    return {
+        'module': module,
+        'median_ms': median / 1000.0,
+        'runs_ms': [t / 1000.0 for t in totals],
+        'heavy': sorted({name.split('.')[0] for name in run} & set(HEAVY_MODULES)),
+        'slowest': sorted(((name, run[name][1] / 1000.0) for name in top), key=lambda item: -item[1]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the apps' cold import time against a budget.")
+    parser.add_argument('--module', action='append', help="Module to import (default: app and app_new)")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1000.0, help="Allowed median import time")
+    parser.add_argument('--allow', action='append', default=[], help="Heavy module allowed at startup")
+    parser.add_argument('--top', type=int, default=8, help="Slowest top-level imports to list")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    reports = [measure(module, args.repeats) for module in args.module or APPS]
+    failures = []
+    for report in reports:
+        report['heavy'] = [name for name in report['heavy'] if name not in args.allow]
+        report['slowest'] = report['slowest'][:args.top]
+        if report['median_ms'] > args.budget_ms:
+            failures.append(f"{report['module']}: {report['median_ms']:.0f} ms over the "
+                            f"{args.budget_ms:.0f} ms budget")
+        if report['heavy']:
+            failures.append(f"{report['module']}: imports {', '.join(report['heavy'])} at startup")
+
+    if args.json:
+        print(json.dumps({'budget_ms': args.budget_ms, 'reports': reports, 'failures': failures}, indent=2))
+    else:
+        for report in reports:
+            runs = ', '.join(f'{t:.0f}' for t in report['runs_ms'])
+            print(f"import {report['module']}: median {report['median_ms']:.0f} ms ({runs})")
+            for name, ms in report['slowest']:
+                print(f"  {name:<28}{ms:>8.1f} ms")
+        for failure in failures:
+            print(f"FAIL {failure}")
+        if not failures:
+            print(f"OK: within {args.budget_ms:.0f} ms and no heavy imports")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
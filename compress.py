@@ -0,0 +1,268 @@
+import argparse
+import copy
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+from fast_forest import FORMAT_VERSION, from_arrays, model_arrays, save_arrays_dir
+from model_registry import MODEL_DIR
+from train import DATASET, load_dataset, prepare_data
+
+# Shrinks the served forest after training: keep the N trees with the best
+# out-of-bag accuracy, cap tree depth (deeper nodes become leaves holding their
+# training class distribution), and quantise split thresholds and leaf values.
+# The result is the fast_forest array format, so it is served by the numpy and
+# mmap backends; the report compares size, latency and accuracy with the original.
+
+THRESHOLD_DTYPES = ('float64', 'float32', 'float16', 'uint8')
+VALUE_DTYPES = ('float64', 'float16', 'uint8')
+
+
+def tree_scores(model, X_train=None, y_train=None, X_val=None, y_val=None, n_real=None):
+    # Accuracy of each tree on the rows it never saw: its out-of-bag rows when the
+    # training data is available, otherwise the shared validation rows. With SMOTE
+    # only the first n_real training rows are real students; the synthetic rows
+    # after them would reward trees that fit the interpolation, so they are skipped.
+    use_oob = (X_train is not None and model.bootstrap
+               and getattr(model, '_n_samples', None) == len(X_train))
+    scores = []
+    if use_oob:
+        real = np.zeros(len(X_train), dtype=bool)
+        real[:len(X_train) if n_real is None else n_real] = True
+        for estimator, in_bag in zip(model.estimators_, model.estimators_samples_):
+            oob = real.copy()
+            oob[in_bag] = False
+            if not oob.any():
+                scores.append(0.0)
+                continue
+            predicted = model.classes_[estimator.predict(X_train[oob]).astype(int)]
+            scores.append(float((predicted == y_train[oob]).mean()))
+    else:
+        for estimator in model.estimators_:
+            predicted = model.classes_[estimator.predict(X_val).astype(int)]
+            scores.append(float((predicted == y_val).mean()))
+    return np.array(scores), 'oob' if use_oob else 'validation'
+
+
+def select_trees(model, n_trees, scores):
+    # Shallow copy of the forest keeping the n_trees best-scoring estimators
+    keep = np.sort(np.argsort(-scores, kind='stable')[:n_trees])
+    pruned = copy.copy(model)
+    pruned.estimators_ = [model.estimators_[i] for i in keep]
+    pruned.n_estimators = len(keep)
+    return pruned
+
+
+def _walk(children, roots):
+    # Depth of every node reachable from the roots (-1 for unreachable ones)
+    depth = np.full(len(children), -1, dtype=np.int64)
+    frontier = np.asarray(roots, dtype=np.int64)
+    level = 0
+    while frontier.size:
+        depth[frontier] = level
+        kids = children[frontier].ravel()
+        kids = kids[depth[kids] == -1]
+        frontier = np.unique(kids)
+        level += 1
+    return depth
+
+
+def cap_depth(arrays, max_depth):
+    # Turn nodes at max_depth into leaves, then drop the nodes no longer reachable
+    arrays = dict(arrays)
+    children = np.array(arrays['children'], dtype=np.int64)
+    own = np.arange(len(children))
+    depth = _walk(children, arrays['roots'])
+    cut = depth == max_depth
+    children[cut] = own[cut, None]
+
+    keep = np.flatnonzero(_walk(children, arrays['roots']) >= 0)
+    new_index = np.full(len(children), -1, dtype=np.int64)
+    new_index[keep] = np.arange(len(keep))
+    index_dtype = arrays['children'].dtype
+    arrays['children'] = new_index[children[keep]].astype(index_dtype)
+    arrays['roots'] = new_index[np.asarray(arrays['roots'], dtype=np.int64)].astype(index_dtype)
+    for key in ('feature', 'threshold', 'value'):
+        arrays[key] = np.asarray(arrays[key])[keep]
+    leaf = arrays['children'][:, 0] == np.arange(len(keep))
+    arrays['feature'] = np.where(leaf, 0, arrays['feature']).astype(arrays['feature'].dtype)
+    arrays['threshold'] = np.where(leaf, 0.0, arrays['threshold'])
+    arrays['max_depth'] = np.asarray(min(int(arrays['max_depth']), max_depth))
+    return arrays
+
+
+def quantize(arrays, thresholds='float64', values='float64'):
+    arrays = dict(arrays)
+    n_features = len(arrays['scaler_mean'])
+    internal = arrays['children'][:, 0] != np.arange(len(arrays['children']))
+    if thresholds == 'uint8':
+        # Per-feature codebook of split points. Exact while a feature has at most 255
+        # of them; beyond that its thresholds snap to the nearest of 255 quantiles
+        bin_edges = np.full((n_features, 255), np.inf)
+        codes = np.zeros(len(arrays['threshold']), dtype=np.uint8)
+        for j in range(n_features):
+            nodes = internal & (arrays['feature'] == j)
+            feature_thresholds = arrays['threshold'][nodes]
+            edges = np.unique(feature_thresholds)
+            if len(edges) > 255:
+                edges = np.unique(np.quantile(feature_thresholds, np.linspace(0, 1, 255)))
+            bin_edges[j, :len(edges)] = edges
+            if not len(edges):
+                continue
+            right = np.minimum(np.searchsorted(edges, feature_thresholds), len(edges) - 1)
+            left = np.maximum(right - 1, 0)
+            nearest = np.where(np.abs(edges[left] - feature_thresholds) < np.abs(edges[right] - feature_thresholds),
+                               left, right)
+            codes[nodes] = nearest
+        arrays['threshold'] = codes
+        arrays['bin_edges'] = bin_edges
+    else:
+        arrays['threshold'] = arrays['threshold'].astype(thresholds)
+    if values == 'uint8':
+        arrays['value'] = np.round(arrays['value'] * 255).astype(np.uint8)
+    else:
+        arrays['value'] = arrays['value'].astype(values)
+    if n_features < 256 and (thresholds != 'float64' or values != 'float64'):
+        arrays['feature'] = arrays['feature'].astype(np.uint8)
+    return arrays
+
+
+def compress(scaler, model, n_trees=None, max_depth=None, thresholds='float64', values='float64',
+             scores=None):
+    if n_trees and n_trees < len(model.estimators_):
+        model = select_trees(model, n_trees, scores)
+    arrays = model_arrays(scaler, model)
+    if max_depth is not None:
+        arrays = cap_depth(arrays, max_depth)
+    return quantize(arrays, thresholds, values)
+
+
+def serialized_size(arrays):
+    buf = io.BytesIO()
+    np.savez(buf, **arrays)
+    return buf.tell()
+
+
+def measure(forest, scaler, X_test, y_test, reference=None, repeats=200):
+    X = scaler.transform(X_test)
+    proba = forest.predict_proba(X)
+    row = X[:1]
+    forest.predict_proba(row)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        forest.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    forest.predict_proba(X)
+    batch_seconds = time.perf_counter() - start
+
+    result = {
+        'accuracy': float((forest.classes_[proba.argmax(axis=1)] == y_test).mean()),
+        'single_row_ms': float(np.median(timings) * 1000.0),
+        'batch_rows_per_second': len(X) / batch_seconds,
+    }
+    if reference is not None:
+        # How often the compressed model keeps the original's top-3 careers
+        top = np.argsort(-proba, axis=1, kind='stable')[:, :3]
+        ref_top = np.argsort(-reference, axis=1, kind='stable')[:, :3]
+        result['top1_agreement'] = float((top[:, 0] == ref_top[:, 0]).mean())
+        result['top3_overlap'] = float(np.mean([len(set(a) & set(b)) / 3 for a, b in zip(top, ref_top)]))
+        result['max_abs_proba_diff'] = float(np.abs(proba - reference).max())
+    return result, proba
+
+
+def save_served(arrays, model_dir, report):
+    # Replace forest.npz and forest/ atomically; CAREERPATH_MODEL_BACKEND=numpy or mmap serves them
+    tmp = os.path.join(model_dir, 'forest.npz.tmp')
+    with open(tmp, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, os.path.join(model_dir, 'forest.npz'))
+    save_arrays_dir(arrays, os.path.join(model_dir, 'forest'))
+    with open(os.path.join(model_dir, 'compression.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prune and quantise the trained forest for serving.")
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--data', default=DATASET)
+    parser.add_argument('--trees', type=int, help="Keep the N trees with the best out-of-bag accuracy")
+    parser.add_argument('--max-depth', type=int, help="Cap every tree at this depth")
+    parser.add_argument('--thresholds', choices=THRESHOLD_DTYPES, default='float64')
+    parser.add_argument('--values', choices=VALUE_DTYPES, default='float64', help="Leaf probability dtype")
+    parser.add_argument('--save', action='store_true', help="Write the result as the served forest.npz and forest/")
+    parser.add_argument('--report', help="Also write the comparison as JSON")
+    args = parser.parse_args(argv)
+
+    scaler = joblib.load(os.path.join(args.model_dir, 'scaler.pkl'))
+    model = joblib.load(os.path.join(args.model_dir, 'model.pkl'))
+    manifest_path = os.path.join(args.model_dir, 'manifest.json')
+    manifest = {}
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    # Rebuild train.py's split so out-of-bag rows and the test set match the fitted model
+    X, y = load_dataset(args.data)
+    seed = manifest.get('seed', 42)
+    # Without a manifest, assume train.py's defaults (SMOTE on)
+    split_scaler, X_train, X_test, y_train, y_test = prepare_data(X, y, seed, smote=manifest.get('smote', True))
+    # SMOTE appends its synthetic rows after the real training rows
+    n_real = len(X) - len(X_test)
+    # prepare_data fits its own scaler; bring both parts back to raw features first
+    X_test = split_scaler.inverse_transform(X_test)
+    X_train = scaler.transform(split_scaler.inverse_transform(X_train))
+
+    scores = selection = None
+    if args.trees:
+        scores, selection = tree_scores(model, X_train, y_train, scaler.transform(X_test), y_test, n_real)
+        print(f"Ranked {len(scores)} trees by {selection} accuracy "
+              f"(best {scores.max():.3f}, worst {scores.min():.3f})")
+
+    original_arrays = model_arrays(scaler, model)
+    compressed = compress(scaler, model, args.trees, args.max_depth, args.thresholds, args.values, scores)
+
+    original_scaler, original_forest = from_arrays(original_arrays)
+    before, reference = measure(original_forest, original_scaler, X_test, y_test)
+    after, _ = measure(from_arrays(compressed)[1], original_scaler, X_test, y_test, reference)
+    before['size_bytes'] = serialized_size(original_arrays)
+    after['size_bytes'] = serialized_size(compressed)
+    before['nodes'], after['nodes'] = len(original_arrays['feature']), len(compressed['feature'])
+    before['trees'], after['trees'] = len(original_arrays['roots']), len(compressed['roots'])
+
+    print(f"{'':<24}{'original':>14}{'compressed':>14}{'change':>10}")
+    for key, label in (('size_bytes', 'size (bytes)'), ('nodes', 'nodes'), ('trees', 'trees'),
+                       ('single_row_ms', 'single-row latency (ms)'), ('batch_rows_per_second', 'batch rows/s'),
+                       ('accuracy', 'test accuracy')):
+        change = (after[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+        print(f"{label:<24}{before[key]:>14.4g}{after[key]:>14.4g}{change:>9.1f}%")
+    print(f"Top-1 agreement with original {after['top1_agreement']:.4f}, "
+          f"top-3 overlap {after['top3_overlap']:.4f}")
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'settings': {'trees': args.trees, 'max_depth': args.max_depth, 'thresholds': args.thresholds,
+                     'values': args.values, 'tree_selection': selection},
+        'original': before,
+        'compressed': after,
+        'test_rows': int(len(X_test)),
+        'format_version': FORMAT_VERSION,
+    }
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save:
+        save_served(compressed, args.model_dir, report)
+        print(f"Saved compressed forest.npz and forest/ to {args.model_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+from scipy.optimize import minimize
+
+from fast_forest import NumpyScaler
+from model_registry import MODEL_DIR
+from surrogate import LinearSurrogate, expand, save_surrogate, softmax
+from train import DATASET, load_dataset, prepare_data
+
+# Distils the trained forest into surrogate.py's multinomial logistic model.
+# The forest labels (with its full probability vectors) a uniform sample of the
+# app's input box plus the real student-scores.csv rows and jittered copies of
+# them (box samples weigh less, since students rarely score 0 across the
+# board); the surrogate is fitted to those soft targets by cross-entropy and
+# checked on box samples it never saw and on train.py's test split, which the
+# forest never saw either. The inputs are bounded
+# integers, but 2^3 * 101^8 points is no grid to enumerate, hence the sampling.
+
+STUDY_HOURS_MAX = 100
+SCORE_MAX = 100
+
+
+def _with_totals(X):
+    X[:, 11] = X[:, 4:11].sum(axis=1)
+    X[:, 12] = X[:, 11] / 7
+    return X
+
+
+def box_sample(n, rng):
+    # Uniform over everything the wizard lets a student enter
+    X = np.empty((n, 13))
+    X[:, 0:3] = rng.integers(0, 2, size=(n, 3))
+    X[:, 3] = rng.integers(0, STUDY_HOURS_MAX + 1, size=n)
+    X[:, 4:11] = rng.integers(0, SCORE_MAX + 1, size=(n, 7))
+    return _with_totals(X)
+
+
+def jitter(X, copies, rng, score_noise=5.0, hours_noise=2.0):
+    # Neighbours of real students: same flags, nearby hours and scores
+    X = np.repeat(X, copies, axis=0)
+    X[:, 3] = np.clip(np.round(X[:, 3] + rng.normal(0, hours_noise, len(X))), 0, STUDY_HOURS_MAX)
+    X[:, 4:11] = np.clip(np.round(X[:, 4:11] + rng.normal(0, score_noise, (len(X), 7))), 0, SCORE_MAX)
+    return _with_totals(X)
+
+
+def fit_softmax(Z, targets, weights=None, l2=1e-4, max_iter=500):
+    # Weighted cross-entropy against the forest's probabilities, minimised with L-BFGS
+    n, d = Z.shape
+    k = targets.shape[1]
+    weights = np.ones(n) if weights is None else np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+
+    def loss(params):
+        W = params[:d * k].reshape(d, k)
+        b = params[d * k:]
+        P = softmax(Z @ W + b)
+        value = -np.sum(weights[:, None] * targets * np.log(P + 1e-12)) + 0.5 * l2 * np.sum(W * W)
+        diff = weights[:, None] * (P - targets)
+        grad = np.concatenate([(Z.T @ diff + l2 * W).ravel(), diff.sum(axis=0)])
+        return value, grad
+
+    result = minimize(loss, np.zeros(d * k + k), jac=True, method='L-BFGS-B', options={'maxiter': max_iter})
+    return result.x[:d * k].reshape(d, k), result.x[d * k:], result
+
+
+def agreement(reference, proba):
+    top = np.argsort(-proba, axis=1, kind='stable')[:, :3]
+    ref_top = np.argsort(-reference, axis=1, kind='stable')[:, :3]
+    overlap = (top[:, :, None] == ref_top[:, None, :]).any(axis=2).sum(axis=1)
+    return {
+        'top1': float((top[:, 0] == ref_top[:, 0]).mean()),
+        'top3_same_set': float((overlap == 3).mean()),
+        'top3_overlap': float(overlap.mean() / 3),
+    }
+
+
+def single_row_us(predict, row, repeats=500):
+    predict(row)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1e6)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distil the forest into a fast multinomial logistic surrogate.")
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--data', default=DATASET)
+    parser.add_argument('--box', type=int, default=20000, help="Uniform samples of the input ranges")
+    parser.add_argument('--box-weight', type=float, default=0.25,
+                        help="Weight of a box sample relative to a real or jittered row")
+    parser.add_argument('--jitter', type=int, default=20, help="Jittered copies of each real training row")
+    parser.add_argument('--degree', type=int, choices=[1, 2], default=2,
+                        help="2 adds pairwise products of the scaled features")
+    parser.add_argument('--l2', type=float, default=1e-4)
+    parser.add_argument('--max-iter', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', action='store_true', help="Write <model-dir>/surrogate.npz")
+    parser.add_argument('--report', help="Also write the comparison as JSON")
+    args = parser.parse_args(argv)
+
+    scaler = joblib.load(os.path.join(args.model_dir, 'scaler.pkl'))
+    model = joblib.load(os.path.join(args.model_dir, 'model.pkl'))
+    manifest_path = os.path.join(args.model_dir, 'manifest.json')
+    manifest = {}
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    rng = np.random.default_rng(args.seed)
+
+    # Rebuild train.py's split, so the surrogate learns from the forest's training
+    # students and both are judged on test rows neither has seen. The split comes
+    # before SMOTE, so it is left out: the real training rows are all we need.
+    X, y = load_dataset(args.data)
+    split_scaler, X_train, X_test, _, y_test = prepare_data(X, y, manifest.get('seed', 42), smote=False)
+    # prepare_data fits its own scaler; bring both parts back to raw features
+    X_train = split_scaler.inverse_transform(X_train)
+    X_test = split_scaler.inverse_transform(X_test)
+
+    X_near = np.vstack([X_train, jitter(X_train, args.jitter, rng)])
+    X_fit = np.vstack([X_near, box_sample(args.box, rng)])
+    weights = np.concatenate([np.ones(len(X_near)), np.full(args.box, args.box_weight)])
+    print(f"Labelling {len(X_fit)} inputs with the forest...")
+    targets = model.predict_proba(scaler.transform(X_fit))
+
+    print(f"Fitting the degree-{args.degree} surrogate...")
+    start = time.perf_counter()
+    coef, intercept, result = fit_softmax(expand(scaler.transform(X_fit), args.degree), targets, weights,
+                                          args.l2, args.max_iter)
+    surrogate = LinearSurrogate(coef, intercept, model.classes_, args.degree)
+    print(f"  {result.nit} iterations in {time.perf_counter() - start:.1f}s, loss {result.fun:.4f}")
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'settings': {key: getattr(args, key) for key in ('box', 'box_weight', 'jitter', 'degree', 'l2', 'seed')},
+        'fit_rows': int(len(X_fit)),
+        'test_rows': int(len(X_test)),
+    }
+    for name, X_eval in (('real_test', X_test), ('box', box_sample(20000, rng))):
+        Z = scaler.transform(X_eval)
+        report[name] = agreement(model.predict_proba(Z), surrogate.predict_proba(Z))
+    Z = scaler.transform(X_test)
+    report['real_test']['forest_accuracy'] = float((model.predict(Z) == y_test).mean())
+    report['real_test']['surrogate_accuracy'] = float((surrogate.predict(Z) == y_test).mean())
+    # Each as served: the pickled sklearn pair, and the surrogate backend's NumPy scaler
+    row = X_test[:1]
+    fast_scaler = NumpyScaler(scaler.mean_, scaler.scale_)
+    report['latency_us'] = {
+        'forest': single_row_us(lambda r: model.predict_proba(scaler.transform(r)), row),
+        'surrogate': single_row_us(lambda r: surrogate.predict_proba(fast_scaler.transform(r)), row),
+    }
+
+    print(f"{'agreement with forest':<24}{'top-1':>8}{'top-3 set':>11}{'top-3 overlap':>15}")
+    for name in ('real_test', 'box'):
+        scores = report[name]
+        print(f"{name:<24}{scores['top1']:>8.3f}{scores['top3_same_set']:>11.3f}{scores['top3_overlap']:>15.3f}")
+    print(f"Test accuracy: forest {report['real_test']['forest_accuracy']:.3f}, "
+          f"surrogate {report['real_test']['surrogate_accuracy']:.3f}")
+    print(f"Single-row latency: forest {report['latency_us']['forest']:.0f} us, "
+          f"surrogate {report['latency_us']['surrogate']:.0f} us")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save:
+        path = os.path.join(args.model_dir, 'surrogate.npz')
+        save_surrogate(path, scaler, surrogate)
+        print(f"Saved {path}; serve it with CAREERPATH_MODEL_BACKEND=surrogate")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import argparse
+import csv
+import gzip
+import importlib.util
+import io
+import sys
+import tempfile
+from datetime import date
+
+from storage import FIELDNAMES, get_store
+
+# Parquet is optional; CSV and gzipped CSV only need the standard library.
+# pyarrow (and the NumPy it pulls in) is only imported when a Parquet file is written.
+_has_parquet = importlib.util.find_spec('pyarrow') is not None
+
+FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'csv.gz': ('application/gzip', '.csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+}
+NUMERIC_FIELDS = {'Age', 'Weekly Study Hours', 'Math', 'History', 'Physics', 'Chemistry', 'Biology',
+                  'English', 'Geography', 'Total Score', 'Average Score'}
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def available_formats():
+    return [fmt for fmt in FORMATS if fmt != 'parquet' or _has_parquet]
+
+
+def export_filename(fmt, name='student_records'):
+    return name + FORMATS[fmt][1]
+
+
+def export_mime(fmt):
+    return FORMATS[fmt][0]
+
+
+def iter_csv_bytes(store=None, chunk_size=DEFAULT_CHUNK_SIZE, **filters):
+    # Encoded CSV, one store chunk at a time; only one chunk is ever held in memory
+    store = store or get_store()
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=FIELDNAMES, extrasaction='ignore')
+    writer.writeheader()
+    for chunk in store.iter_rows(chunk_size, **filters):
+        writer.writerows(chunk)
+        yield buf.getvalue().encode('utf-8')
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode('utf-8')
+
+
+def _to_number(value):
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _write_parquet(f, store, chunk_size, filters):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(field, pa.float64() if field in NUMERIC_FIELDS else pa.string())
+                        for field in FIELDNAMES])
+    with pq.ParquetWriter(f, schema, compression='zstd') as writer:
+        for chunk in store.iter_rows(chunk_size, **filters):
+            columns = {
+                field: [_to_number(row.get(field)) if field in NUMERIC_FIELDS
+                        else (None if row.get(field) is None else str(row.get(field))) for row in chunk]
+                for field in FIELDNAMES
+            }
+            writer.write_table(pa.table(columns, schema=schema))
+
+
+def write_export(f, fmt='csv', store=None, chunk_size=DEFAULT_CHUNK_SIZE, **filters):
+    # Write filtered records to the binary file object `f` in the requested format
+    store = store or get_store()
+    if fmt == 'csv':
+        for data in iter_csv_bytes(store, chunk_size, **filters):
+            f.write(data)
+    elif fmt == 'csv.gz':
+        with gzip.GzipFile(fileobj=f, mode='wb') as gz:
+            for data in iter_csv_bytes(store, chunk_size, **filters):
+                gz.write(data)
+    elif fmt == 'parquet':
+        if not _has_parquet:
+            raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+        _write_parquet(f, store, chunk_size, filters)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+
+def export_to_tempfile(fmt='csv', store=None, **filters):
+    # Used as a deferred download: nothing is read until the user clicks the button
+    f = tempfile.TemporaryFile()
+    write_export(f, fmt, store, **filters)
+    f.seek(0)
+    return f
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export student records in chunks.")
+    parser.add_argument('-o', '--output', help="Output file (defaults to student_records.<format>)")
+    parser.add_argument('--format', choices=list(FORMATS), default='csv')
+    parser.add_argument('--start', type=date.fromisoformat, help="First day to include (YYYY-MM-DD)")
+    parser.add_argument('--end', type=date.fromisoformat, help="Last day to include (YYYY-MM-DD)")
+    parser.add_argument('--background', action='append', dest='backgrounds',
+                        help="Only include this background (repeatable)")
+    args = parser.parse_args(argv)
+
+    output = args.output or export_filename(args.format)
+    with open(output, 'wb') as f:
+        write_export(f, args.format, start=args.start, end=args.end, backgrounds=args.backgrounds)
+    print(f"Exported records -> {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
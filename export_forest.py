@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+
+import joblib
+import numpy as np
+
+from fast_forest import export_model, export_model_dir, load_model
+from model_registry import MODEL_DIR
+
+TOLERANCE = 1e-9
+
+
+def verify(scaler, model, path, n_samples=2000, seed=0):
+    # Compare the exported predictor with sklearn on random inputs in the app's ranges
+    rng = np.random.default_rng(seed)
+    X = np.empty((n_samples, scaler.n_features_in_))
+    X[:, 0:3] = rng.integers(0, 2, size=(n_samples, 3))
+    X[:, 3] = rng.integers(0, 101, size=n_samples)
+    X[:, 4:11] = rng.integers(0, 101, size=(n_samples, 7))
+    X[:, 11] = X[:, 4:11].sum(axis=1)
+    X[:, 12] = X[:, 11] / 7
+
+    expected = model.predict_proba(scaler.transform(X))
+    fast_scaler, forest = load_model(path)
+    actual = forest.predict_proba(fast_scaler.transform(X))
+    return float(np.max(np.abs(expected - actual)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the trained forest to a NumPy-only .npz format.")
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--layout', choices=['npz', 'npy'], default='npz',
+                        help="npz: single file; npy: directory of memory-mappable arrays")
+    parser.add_argument('-o', '--output', help="Output path (defaults to <model-dir>/forest.npz or <model-dir>/forest)")
+    args = parser.parse_args(argv)
+
+    scaler_path = os.path.join(args.model_dir, 'scaler.pkl')
+    model_path = os.path.join(args.model_dir, 'model.pkl')
+    for path in (scaler_path, model_path):
+        if not os.path.isfile(path):
+            raise SystemExit(f"Model file not found: {path}")
+    default_name = 'forest.npz' if args.layout == 'npz' else 'forest'
+    output = args.output or os.path.join(args.model_dir, default_name)
+
+    print(f"Loading {scaler_path} and {model_path}...")
+    scaler = joblib.load(scaler_path)
+    model = joblib.load(model_path)
+
+    if args.layout == 'npz':
+        arrays = export_model(scaler, model, output)
+        size = os.path.getsize(output)
+    else:
+        arrays = export_model_dir(scaler, model, output)
+        size = sum(array.nbytes for array in arrays.values())
+    print(f"Exported {len(arrays['roots'])} trees, {len(arrays['feature'])} nodes -> {output} "
+          f"({size / 1e6:.2f} MB, pickle was {os.path.getsize(model_path) / 1e6:.2f} MB)")
+
+    max_diff = verify(scaler, model, output)
+    print(f"Max probability difference vs sklearn: {max_diff:.2e}")
+    if max_diff > TOLERANCE:
+        print("Exported forest does not match sklearn within tolerance", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+import json
+import os
+
+import numpy as np
+
+# Compact, array-backed stand-in for the pickled StandardScaler + RandomForestClassifier.
+# All trees are concatenated into flat node arrays; leaves point back to themselves so a
+# batch of rows can walk every tree in lock-step without per-node Python branching.
+# children[i] holds (left, right) for node i, so one gather picks the next node.
+# Compressed forests (compress.py) may store float16/uint8 leaf values, and uint8
+# thresholds that index per-feature bin_edges instead of raw feature values.
+
+FORMAT_VERSION = 1
+DEFAULT_ROW_CHUNK = 4096
+# In the directory layout every array is a raw .npy file and format.json is written
+# last; loaders memory-map the arrays so worker processes share them via the page cache.
+DIR_MANIFEST = 'format.json'
+
+
+class NumpyScaler:
+    def __init__(self, mean, scale):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        self.n_features_in_ = len(self.mean_)
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class FastForest:
+    def __init__(self, feature, threshold, children, value, roots, max_depth, classes, bin_edges=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.bin_edges = bin_edges
+        self.n_estimators = len(roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _encode(self, X):
+        # Replace each value by the number of that feature's split points below it;
+        # then value > threshold is exactly code > threshold index
+        codes = np.empty(X.shape, dtype=np.uint8)
+        for j in range(X.shape[1]):
+            codes[:, j] = np.searchsorted(self.bin_edges[j], X[:, j], side='left')
+        return codes
+
+    def _predict_chunk(self, X):
+        if self.bin_edges is not None:
+            X = self._encode(X)
+        n, n_features = X.shape
+        n_trees = self.n_estimators
+        # One slot per (row, tree); only slots that have not reached a leaf are advanced
+        node = np.tile(self.roots, n)
+        row_offset = np.repeat(np.arange(n, dtype=np.int64) * n_features, n_trees)
+        flat_X = X.ravel()
+        flat_children = self.children.ravel()
+        active = np.arange(n * n_trees)
+        while active.size:
+            current = node[active]
+            go_right = flat_X[row_offset[active] + self.feature[current]] > self.threshold[current]
+            nxt = flat_children[current * 2 + go_right]
+            node[active] = nxt
+            active = active[nxt != current]
+        node = node.reshape(n, n_trees)
+
+        # Average the per-tree class distributions, one tree at a time to bound memory
+        proba = np.zeros((n, self.value.shape[1]), dtype=np.float64)
+        for t in range(self.n_estimators):
+            proba += self.value[node[:, t]]
+        if self.value.dtype != np.float64:
+            # Quantised leaf values no longer sum to exactly one per leaf
+            return proba / proba.sum(axis=1, keepdims=True)
+        return proba / self.n_estimators
+
+    def predict_proba(self, X, chunk_size=DEFAULT_ROW_CHUNK):
+        # sklearn trees compare float32 features against float64 thresholds; do the same
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(X) <= chunk_size:
+            return self._predict_chunk(X)
+        return np.vstack([self._predict_chunk(X[start:start + chunk_size])
+                          for start in range(0, len(X), chunk_size)])
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def flatten_forest(model):
+    # Concatenate every tree's node arrays, re-basing child indices to global offsets
+    features, thresholds, children, values, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        left = tree.children_left.astype(np.int64)
+        right = tree.children_right.astype(np.int64)
+        is_leaf = left == -1
+        own = np.arange(n)
+        left = np.where(is_leaf, own, left) + offset
+        right = np.where(is_leaf, own, right) + offset
+
+        value = tree.value[:, 0, :].astype(np.float64)
+        totals = value.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        children.append(np.stack([left, right], axis=1))
+        values.append(value / totals)
+        roots.append(offset)
+        max_depth = max(max_depth, tree.max_depth)
+        offset += n
+
+    index_dtype = np.int32 if offset < np.iinfo(np.int32).max else np.int64
+    return {
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'children': np.concatenate(children).astype(index_dtype),
+        'value': np.concatenate(values).astype(np.float64),
+        'roots': np.asarray(roots, dtype=index_dtype),
+        'max_depth': np.asarray(max_depth),
+        'classes': np.asarray(model.classes_),
+    }
+
+
+def model_arrays(scaler, model):
+    arrays = flatten_forest(model)
+    arrays['scaler_mean'] = np.asarray(scaler.mean_, dtype=np.float64)
+    arrays['scaler_scale'] = np.asarray(scaler.scale_, dtype=np.float64)
+    arrays['format_version'] = np.asarray(FORMAT_VERSION)
+    return arrays
+
+
+def export_model(scaler, model, path):
+    arrays = model_arrays(scaler, model)
+    np.savez(path, **arrays)
+    return arrays
+
+
+def save_arrays_dir(arrays, directory):
+    # Each file is written under a temporary name and renamed into place, so workers
+    # that still map the old arrays keep a valid (unlinked) inode instead of a
+    # truncated file.
+    os.makedirs(directory, exist_ok=True)
+    scalars = {key: array.item() for key, array in arrays.items() if np.ndim(array) == 0}
+    for key, array in arrays.items():
+        if key in scalars:
+            continue
+        tmp = os.path.join(directory, f'.{key}.npy.tmp')
+        with open(tmp, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array), allow_pickle=False)
+        os.replace(tmp, os.path.join(directory, f'{key}.npy'))
+    tmp = os.path.join(directory, f'.{DIR_MANIFEST}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'format_version': FORMAT_VERSION, 'scalars': scalars,
+                   'arrays': sorted(set(arrays) - set(scalars))}, f)
+    os.replace(tmp, os.path.join(directory, DIR_MANIFEST))
+
+
+def export_model_dir(scaler, model, directory):
+    arrays = model_arrays(scaler, model)
+    save_arrays_dir(arrays, directory)
+    return arrays
+
+
+def from_arrays(arrays):
+    scaler = NumpyScaler(arrays['scaler_mean'], arrays['scaler_scale'])
+    forest = FastForest(arrays['feature'], arrays['threshold'], arrays['children'],
+                        arrays['value'], arrays['roots'], arrays['max_depth'], arrays['classes'],
+                        arrays.get('bin_edges'))
+    return scaler, forest
+
+
+def load_arrays_dir(directory, mmap_mode='r'):
+    with open(os.path.join(directory, DIR_MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    arrays = {key: np.asarray(value) for key, value in manifest['scalars'].items()}
+    for key in manifest['arrays']:
+        arrays[key] = np.load(os.path.join(directory, f'{key}.npy'), mmap_mode=mmap_mode, allow_pickle=False)
+    return arrays
+
+
+def load_model(path, mmap_mode='r'):
+    # `path` is either a forest.npz file (loaded into memory) or a directory of
+    # .npy files (memory-mapped read-only unless mmap_mode is None)
+    if os.path.isdir(path):
+        arrays = load_arrays_dir(path, mmap_mode)
+    else:
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+    if int(arrays.get('format_version', 0)) != FORMAT_VERSION:
+        raise ValueError(f"Unsupported forest format in {path}")
+    return from_arrays(arrays)
@@ -0,0 +1,177 @@
+import bisect
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Timing spans for the hot path. `with span('stage'):` adds the elapsed time to a
+# process-wide histogram per stage and, inside `with collect(metrics):`, to that
+# Metrics object too -- the app collects one per Streamlit session. Histograms
+# use fixed buckets, so recording is O(1) and memory does not grow with traffic.
+# Results are read by the Performance page, served as Prometheus text by
+# serve.py's /metrics, and optionally logged when a span is slow.
+
+ENABLED = os.environ.get('CAREERPATH_INSTRUMENTATION', '1') != '0'
+# Spans taking at least this many milliseconds are logged to "careerpath.spans"
+_log_ms = os.environ.get('CAREERPATH_SPAN_LOG_MS')
+LOG_THRESHOLD_MS = float(_log_ms) if _log_ms else None
+
+# Upper bounds in seconds, as in a Prometheus histogram
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger('careerpath.spans')
+if LOG_THRESHOLD_MS is not None and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        # Linear interpolation inside the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if n and cumulative + n >= target:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = min(BUCKETS[i] if i < len(BUCKETS) else self.max, self.max)
+                return lower + (max(upper, lower) - lower) * (target - cumulative) / n
+            cumulative += n
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_s': self.sum,
+            'mean_ms': self.sum / self.count * 1000.0 if self.count else 0.0,
+            'p50_ms': self.quantile(0.5) * 1000.0,
+            'p95_ms': self.quantile(0.95) * 1000.0,
+            'p99_ms': self.quantile(0.99) * 1000.0,
+            'max_ms': self.max * 1000.0,
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def summary(self):
+        with self._lock:
+            return [dict(stage=stage, **histogram.summary()) for stage, histogram in sorted(self._histograms.items())]
+
+    def slowest(self, by='p95_ms', n=10):
+        return sorted(self.summary(), key=lambda row: row[by], reverse=True)[:n]
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self.started = time.time()
+
+    def prometheus_text(self, name='careerpath_stage_seconds'):
+        lines = [f'# HELP {name} Time spent in each instrumented stage.', f'# TYPE {name} histogram']
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                label = stage.replace('\\', '\\\\').replace('"', '\\"')
+                cumulative = 0
+                for bound, n in zip(BUCKETS, histogram.counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{stage="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{label}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{stage="{label}"}} {histogram.sum}')
+                lines.append(f'{name}_count{{stage="{label}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+_current = contextvars.ContextVar('careerpath_session_metrics', default=None)
+
+
+def record(stage, seconds):
+    get_metrics().observe(stage, seconds)
+    session = _current.get()
+    if session is not None:
+        session.observe(stage, seconds)
+    if LOG_THRESHOLD_MS is not None and seconds * 1000.0 >= LOG_THRESHOLD_MS:
+        logger.info("%s took %.2f ms", stage, seconds * 1000.0)
+
+
+@contextmanager
+def span(stage):
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def timed(stage):
+    # Decorator form of span()
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def collect(metrics):
+    # Spans opened in this context (and the code it calls) also land in `metrics`
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def session_metrics(state):
+    # Per-session Metrics kept in st.session_state (or any dict-like)
+    metrics = state.get('_stage_metrics')
+    if metrics is None:
+        metrics = state['_stage_metrics'] = Metrics()
+    return metrics
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    # Process-wide histograms shared by every session and worker thread
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
@@ -0,0 +1,483 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import Counter
+
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from instrumentation import Metrics
+
+# websockets is what the Streamlit server itself is tested with; the harness needs it
+try:
+    from websockets.asyncio.client import connect
+    from websockets.exceptions import WebSocketException
+    _has_websockets = True
+except ImportError:
+    _has_websockets = False
+
+# Load test for the Streamlit app. Starts `streamlit run app.py` locally (or
+# targets --url), then ramps up concurrent virtual students. Each one opens a
+# WebSocket session the way a browser tab does, walks the wizard from step 1 to
+# the results (or submits the express form) with answers resampled from
+# student-scores.csv, and leaves. Latency is measured per step from sending
+# the widget change until the server's script run finishes, including the
+# st.rerun() that Next/Back trigger. For every concurrency level the report
+# lists throughput, per-step p50/p95/p99, error rates and server CPU, and
+# names the first level at which the app saturates.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATASET = os.path.join(HERE, 'Jupiter file & dataset', 'student-scores.csv')
+BACKGROUNDS = ['Pre-Medical', 'Pre-Engineering', 'ICS', 'Arts', 'Commerce']
+RESULTS_HEADER = '🎯'
+
+
+class StepError(Exception):
+    # A step that finished but drew the wrong page, an st.error or an exception
+    def __init__(self, stage, kind, detail):
+        super().__init__(f"{stage}: {kind}: {detail}")
+        self.stage = stage
+        self.kind = kind
+        self.detail = detail
+
+
+def load_rows(path=DATASET):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def random_student(rows, rng):
+    # A real student-scores.csv row with its scores and study hours jittered, so
+    # inputs follow the training distributions (correlations included) without
+    # replaying the file verbatim
+    while True:
+        row = rng.choice(rows)
+        scores = {column[:-len('_score')]: min(100, max(0, int(value) + rng.randint(-5, 5)))
+                  for column, value in row.items() if column.endswith('_score')}
+        # The wizard turns away averages below 40; a real student would retry
+        if sum(scores.values()) / len(scores) >= 40:
+            break
+    return {
+        'name': f"{row['first_name']} {row['last_name']}",
+        'age': rng.randint(16, 25),
+        'gender': 'Female' if row['gender'].strip().lower() == 'female' else 'Male',
+        'background': rng.choice(BACKGROUNDS),
+        'part_time_job': row['part_time_job'].strip().lower() == 'true',
+        'extracurricular_activities': row['extracurricular_activities'].strip().lower() == 'true',
+        'study_hours': min(100, max(0, int(row['weekly_self_study_hours']) + rng.randint(-2, 2))),
+        'scores': scores,
+    }
+
+
+def subject_score(student, subject, rng):
+    # app.py asks for the dataset's own subjects; app_new.py's (Urdu, Islamiat, ...) reuse one of them
+    score = student['scores'].get(subject.lower())
+    # Not `or`: a real score of 0 must not be swapped for another subject's
+    return score if score is not None else rng.choice(list(student['scores'].values()))
+
+
+class Page:
+    # What one script run drew: widgets by user key, headers, errors and exceptions
+    def __init__(self, messages):
+        self.widgets = {}
+        self.headers = []
+        self.errors = []
+        self.exceptions = []
+        self.query_string = None
+        for msg in messages:
+            kind = msg.WhichOneof('type')
+            if kind == 'page_info_changed':
+                self.query_string = msg.page_info_changed.query_string
+            if kind != 'delta' or msg.delta.WhichOneof('type') != 'new_element':
+                continue
+            element = msg.delta.new_element
+            element_type = element.WhichOneof('type')
+            proto = getattr(element, element_type)
+            if element_type == 'heading':
+                self.headers.append(proto.body)
+            elif element_type == 'exception':
+                self.exceptions.append(proto.message)
+            elif element_type == 'alert' and proto.format == Alert.Format.ERROR:
+                self.errors.append(proto.body)
+            widget_id = getattr(proto, 'id', '')
+            if widget_id.startswith('$$ID-'):
+                # Generated ids end in the widget's key ("None" when it has none)
+                key = widget_id.split('-', 2)[2]
+                if element_type == 'button' and proto.is_form_submitter:
+                    key = 'form_submit'
+                self.widgets[key] = (element_type, proto)
+
+    def has_header(self, text):
+        return any(text in header for header in self.headers)
+
+
+def widget_state(element_type, proto, value):
+    # Encoded the way the browser (and AppTest) sends each widget's value
+    state = WidgetState(id=proto.id)
+    if element_type == 'button':
+        state.trigger_value = True
+    elif element_type in ('text_input', 'radio', 'selectbox'):
+        state.string_value = value
+    elif element_type == 'number_input':
+        state.double_value = value
+    elif element_type == 'slider':
+        state.double_array_value.data[:] = [value]
+    elif element_type == 'checkbox':
+        state.bool_value = value
+    else:
+        raise ValueError(f"Unsupported widget type: {element_type}")
+    return state
+
+
+class Session:
+    # One browser tab: a WebSocket to /_stcore/stream and the widget values it has set
+
+    def __init__(self, url, query_string='', timeout=60.0):
+        self.url = url
+        self.query_string = query_string
+        self.timeout = timeout
+        self.page = None
+        self.script_runs = 0
+        self._values = {}
+        self._ws = None
+
+    async def __aenter__(self):
+        self._ws = await connect(self.url, max_size=None, open_timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._ws.close()
+
+    async def _rerun(self, states):
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query_string
+        msg.rerun_script.widget_states.widgets.extend(states)
+        await self._ws.send(msg.SerializeToString())
+        messages = []
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(await asyncio.wait_for(self._ws.recv(), self.timeout))
+            messages.append(reply)
+            if reply.WhichOneof('type') != 'script_finished':
+                continue
+            self.script_runs += 1
+            # st.rerun() ends the run early and the server starts the next one itself
+            if reply.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        page = Page(messages)
+        if page.query_string is not None:
+            self.query_string = page.query_string
+        return page
+
+    async def act(self, values=None, click=None):
+        # Change widgets (by key) and/or click a button, then wait for the rerun to finish
+        states = []
+        for key, value in (values or {}).items():
+            element_type, proto = self.page.widgets[key]
+            self._values[proto.id] = widget_state(element_type, proto, value)
+        present = {proto.id for _, proto in self.page.widgets.values()} if self.page else set()
+        states = [state for widget_id, state in self._values.items() if widget_id in present]
+        if click is not None:
+            element_type, proto = self.page.widgets[click]
+            states.append(widget_state(element_type, proto, True))
+        self.page = await self._rerun(states)
+        return self.page
+
+
+class Student:
+    # Walks one virtual student through the app, timing each step into `metrics`
+
+    def __init__(self, session, answers, metrics, rng, think_ms):
+        self.session = session
+        self.answers = answers
+        self.metrics = metrics
+        self.rng = rng
+        self.think_ms = think_ms
+        self.stage = 'connect'
+
+    async def step(self, stage, expect, values=None, click=None):
+        self.stage = stage
+        if self.think_ms and self.session.page is not None:
+            await asyncio.sleep(self.rng.expovariate(1000.0 / self.think_ms))
+        start = time.perf_counter()
+        page = await self.session.act(values, click)
+        elapsed = time.perf_counter() - start
+        if page.exceptions:
+            raise StepError(stage, 'exception', page.exceptions[0])
+        if page.errors:
+            raise StepError(stage, 'st.error', page.errors[0])
+        if not page.has_header(expect):
+            raise StepError(stage, 'wrong page', f"expected '{expect}', got {page.headers}")
+        self.metrics.observe(stage, elapsed)
+        return page
+
+    def scores(self, prefix):
+        return {key: subject_score(self.answers, key[len(prefix):], self.rng)
+                for key, (element_type, _) in self.session.page.widgets.items()
+                if element_type == 'slider' and key.startswith(prefix)}
+
+    async def wizard(self):
+        a = self.answers
+        await self.step('step1', 'Step 1')
+        await self.step('step2', 'Step 2', {'input_name': a['name']}, 'next_1')
+        await self.step('step3', 'Step 3', {'input_age': a['age']}, 'next_2')
+        await self.step('step4', 'Step 4', {'input_gender': a['gender']}, 'next_3')
+        await self.step('step5', 'Step 5', {'input_background': a['background']}, 'next_4')
+        await self.step('step6', 'Step 6', {'input_part_time': 'Yes' if a['part_time_job'] else 'No'}, 'next_5')
+        await self.step('step7', 'Step 7', {'input_extracurricular': 'Yes' if a['extracurricular_activities'] else 'No'},
+                        'next_6')
+        await self.step('step8', 'Step 8', {'input_study_hours': a['study_hours']}, 'next_7')
+        await self.step('step9', RESULTS_HEADER, self.scores('score_'), 'submit')
+
+    async def express(self):
+        a = self.answers
+        page = await self.step('express.form', 'Tell us about yourself')
+        values = {'express_name': a['name'], 'express_age': a['age'], 'express_gender': a['gender'],
+                  'express_part_time': a['part_time_job'],
+                  'express_extracurricular': a['extracurricular_activities'],
+                  'express_study_hours': a['study_hours']}
+        _, background = page.widgets['express_background']
+        if background.form_id:
+            values['express_background'] = a['background']
+        else:
+            # app_new.py: the background picks the subject sliders, so it reruns on its own
+            await self.step('express.background', 'Tell us about yourself', {'express_background': a['background']})
+        values.update(self.scores('express_score_'))
+        await self.step('step9', RESULTS_HEADER, values, 'form_submit')
+
+    async def run(self, mode, save):
+        await (self.express() if mode == 'express' else self.wizard())
+        if save:
+            await self.step('save', RESULTS_HEADER, click='save_data')
+
+
+def _query_string(mode):
+    return 'mode=express' if mode == 'express' else ''
+
+
+async def warm_up(url, rows, args):
+    # One unrecorded student first: imports and the model load are not load
+    rng = random.Random(args.seed)
+    async with Session(url, _query_string(args.mode), args.timeout) as session:
+        await Student(session, random_student(rows, rng), Metrics(), rng, 0).run(args.mode, False)
+
+
+async def run_level(url, users, args, rows, level_seed):
+    metrics = Metrics()
+    errors = Counter()
+    samples = {}
+    completed = 0
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + args.ramp + args.duration
+    query_string = _query_string(args.mode)
+
+    async def virtual_user(index):
+        nonlocal completed
+        rng = random.Random(level_seed * 100003 + index)
+        # Ramp-up: users join evenly over the first --ramp seconds
+        await asyncio.sleep(args.ramp * index / users)
+        while loop.time() < deadline:
+            answers = random_student(rows, rng)
+            student = None
+            try:
+                async with Session(url, query_string, args.timeout) as session:
+                    student = Student(session, answers, metrics, rng, args.think_ms)
+                    await student.run(args.mode, rng.random() < args.save_fraction)
+                completed += 1
+            except StepError as e:
+                errors[e.stage, e.kind] += 1
+                samples.setdefault((e.stage, e.kind), e.detail)
+            except (OSError, asyncio.TimeoutError, WebSocketException) as e:
+                key = (student.stage if student else 'connect', type(e).__name__)
+                errors[key] += 1
+                samples.setdefault(key, str(e))
+                await asyncio.sleep(0.5)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(virtual_user(i) for i in range(users)))
+    return metrics, errors, samples, completed, time.perf_counter() - start
+
+
+def _cpu_seconds(pid):
+    # utime + stime of a local server process, from /proc (Linux only)
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port, env, log, timeout=120.0):
+    cmd = [sys.executable, '-m', 'streamlit', 'run', app, '--server.headless', 'true',
+           '--server.port', str(port), '--server.address', '127.0.0.1',
+           '--browser.gatherUsageStats', 'false', '--server.fileWatcherType', 'none']
+    proc = subprocess.Popen(cmd, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"streamlit exited with code {proc.returncode}; see {log.name}")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=2) as response:
+                if response.read().strip() == b'ok':
+                    return proc
+        except OSError:
+            time.sleep(0.5)
+    proc.terminate()
+    raise SystemExit(f"streamlit did not become healthy within {timeout:.0f}s; see {log.name}")
+
+
+def summarize_level(users, metrics, errors, samples, completed, elapsed, cpu):
+    stages = {row['stage']: row for row in metrics.summary()}
+    steps = sum(row['count'] for row in stages.values())
+    failed = sum(errors.values())
+    step9 = stages.get('step9', {})
+    return {
+        'users': users,
+        'elapsed_s': elapsed,
+        'students_completed': completed,
+        'students_per_s': completed / elapsed,
+        'steps_per_s': steps / elapsed,
+        'error_rate': failed / (steps + failed) if steps + failed else 0.0,
+        'errors': [{'stage': stage, 'kind': kind, 'count': n, 'example': samples.get((stage, kind))}
+                   for (stage, kind), n in errors.most_common()],
+        'step9_p95_ms': step9.get('p95_ms'),
+        'server_cpu': cpu,
+        'stages': stages,
+    }
+
+
+def saturation(level, previous, args):
+    # Why this level counts as saturated, if it does
+    reasons = []
+    if level['error_rate'] > args.max_error_rate:
+        reasons.append(f"error rate {level['error_rate']:.1%} > {args.max_error_rate:.1%}")
+    if level['step9_p95_ms'] is not None and level['step9_p95_ms'] > args.slo_ms:
+        reasons.append(f"step 9 p95 {level['step9_p95_ms']:.0f} ms > {args.slo_ms:.0f} ms")
+    if previous and previous['steps_per_s']:
+        # More users should bring at least --min-gain of the proportional throughput increase
+        ideal = previous['steps_per_s'] * level['users'] / previous['users']
+        wanted = previous['steps_per_s'] + args.min_gain * (ideal - previous['steps_per_s'])
+        if level['steps_per_s'] < wanted:
+            reasons.append(f"throughput {level['steps_per_s']:.1f} steps/s, wanted >= {wanted:.1f}")
+    return reasons
+
+
+def print_level(level, stage_order):
+    cpu = f"{level['server_cpu']:.0%}" if level['server_cpu'] is not None else 'n/a'
+    step9 = f"{level['step9_p95_ms']:.0f}" if level['step9_p95_ms'] is not None else '-'
+    print(f"{level['users']:>6}{level['students_per_s']:>12.2f}{level['steps_per_s']:>10.1f}"
+          f"{step9:>12}{level['error_rate']:>9.1%}{cpu:>8}")
+    for stage in stage_order:
+        row = level['stages'].get(stage)
+        if row:
+            print(f"{'':>8}{stage:<20}{row['count']:>7}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+                  f"{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}")
+    for error in level['errors']:
+        print(f"{'':>8}{error['count']} x {error['kind']} at {error['stage']}: {str(error['example'])[:100]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ramp up concurrent virtual students against a local app server.")
+    parser.add_argument('--app', default=os.path.join(HERE, 'app.py'), help="Script to serve with streamlit run")
+    parser.add_argument('--url', help="Target a running server instead, e.g. ws://127.0.0.1:8501/_stcore/stream")
+    parser.add_argument('--users', default='1,2,4,8,16,32', help="Concurrency levels to ramp through")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds at each level, after the ramp")
+    parser.add_argument('--ramp', type=float, default=5.0, help="Seconds over which a level's users join")
+    parser.add_argument('--think-ms', type=float, default=500.0, help="Mean pause between a student's actions")
+    parser.add_argument('--mode', choices=['wizard', 'express'], default='wizard')
+    parser.add_argument('--save-fraction', type=float, default=0.0, help="Share of students who click Save Data")
+    parser.add_argument('--slo-ms', type=float, default=1000.0, help="Step 9 p95 above this means saturated")
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--min-gain', type=float, default=0.5,
+                        help="Share of the proportional throughput gain a level must reach")
+    parser.add_argument('--keep-going', action='store_true', help="Run every level even after saturation")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Seconds to wait for one script run")
+    parser.add_argument('--data', default=DATASET, help="student-scores.csv to draw answers from")
+    parser.add_argument('--data-dir', help="CAREERPATH_DATA_DIR for the served app (default: a temp dir)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if not _has_websockets:
+        raise SystemExit("loadtest.py needs the websockets package (pip install websockets)")
+    levels = [int(n) for n in args.users.split(',')]
+    rows = load_rows(args.data)
+
+    server = log = None
+    if args.url:
+        url = args.url
+    else:
+        port = free_port()
+        env = dict(os.environ)
+        # Saved records go to a scratch directory unless asked otherwise
+        env['CAREERPATH_DATA_DIR'] = args.data_dir or tempfile.mkdtemp(prefix='careerpath-loadtest-')
+        log = tempfile.NamedTemporaryFile('w', prefix='careerpath-loadtest-', suffix='.log', delete=False)
+        print(f"Starting streamlit run {os.path.basename(args.app)} on port {port} (log: {log.name})")
+        server = start_server(args.app, port, env, log)
+        url = f'ws://127.0.0.1:{port}/_stcore/stream'
+
+    if args.mode == 'express':
+        stage_order = ['express.form', 'express.background', 'step9', 'save']
+    else:
+        stage_order = [f'step{n}' for n in range(1, 10)] + ['save']
+    report = {'url': url, 'mode': args.mode, 'think_ms': args.think_ms, 'levels': []}
+    try:
+        asyncio.run(warm_up(url, rows, args))
+        print(f"{'users':>6}{'students/s':>12}{'steps/s':>10}{'step9 p95':>12}{'errors':>9}{'CPU':>8}")
+        print(f"{'':>8}{'stage':<20}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        previous = None
+        for index, users in enumerate(levels):
+            cpu_before = _cpu_seconds(server.pid) if server else None
+            metrics, errors, samples, completed, elapsed = asyncio.run(run_level(url, users, args, rows, index))
+            cpu_after = _cpu_seconds(server.pid) if server else None
+            cpu = (cpu_after - cpu_before) / elapsed if cpu_before is not None and cpu_after is not None else None
+            level = summarize_level(users, metrics, errors, samples, completed, elapsed, cpu)
+            level['saturated'] = saturation(level, previous, args)
+            report['levels'].append(level)
+            print_level(level, stage_order)
+            if level['saturated']:
+                report.setdefault('saturation', {'users': users, 'reasons': level['saturated']})
+                if not args.keep_going:
+                    break
+            previous = level
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+            log.close()
+
+    healthy = [level['users'] for level in report['levels'] if not level['saturated']]
+    if 'saturation' in report:
+        print(f"Saturated at {report['saturation']['users']} concurrent students: "
+              f"{'; '.join(report['saturation']['reasons'])}")
+    else:
+        print("No saturation within the tested levels")
+    print(f"Highest healthy level: {max(healthy) if healthy else 'none'} concurrent students")
+    report['highest_healthy'] = max(healthy) if healthy else None
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
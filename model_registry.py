@@ -0,0 +1,136 @@
+import importlib
+import logging
+import os
+import threading
+
+from profiling import profiled, restart
+
+# Default model directory, overridable for deployments that keep artifacts elsewhere
+MODEL_DIR = os.environ.get('CAREERPATH_MODEL_DIR',
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model'))
+
+# "sklearn" loads scaler.pkl + model.pkl; "numpy" loads the flattened forest.npz
+# written by export_forest.py and serves it without importing sklearn; "mmap"
+# memory-maps the forest/ directory of .npy arrays so workers share one copy;
+# "surrogate" serves the distilled logistic model from surrogate.npz (distill.py).
+MODEL_BACKEND = os.environ.get('CAREERPATH_MODEL_BACKEND', 'sklearn').lower()
+BACKEND_FILES = {
+    'sklearn': ('scaler.pkl', 'model.pkl'),
+    'numpy': ('forest.npz',),
+    'mmap': (os.path.join('forest', 'format.json'),),
+    'surrogate': ('surrogate.npz',),
+}
+# The apps import nothing heavy at startup; preload() warms the model on a
+# background thread after the first page is served (CAREERPATH_PRELOAD=0 disables)
+PRELOAD = os.environ.get('CAREERPATH_PRELOAD', '1') != '0'
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    # Loads the scaler and model lazily, once per process, and reloads them
+    # when either file's mtime changes so a retrained model is picked up live.
+
+    def __init__(self, model_dir=MODEL_DIR, backend=MODEL_BACKEND):
+        if backend not in BACKEND_FILES:
+            raise ValueError(f"Unknown model backend: {backend}")
+        self.model_dir = model_dir
+        self.backend = backend
+        self.paths = [os.path.join(model_dir, name) for name in BACKEND_FILES[backend]]
+        self._lock = threading.Lock()
+        # (mtimes, scaler, model, version) swapped in as one tuple so readers never see a
+        # half-reload, nor a model paired with another load's version
+        self._loaded = None
+
+    @property
+    def version(self):
+        loaded = self._loaded
+        return loaded[3] if loaded is not None else 0
+
+    def _mtimes(self):
+        mtimes = []
+        for path in self.paths:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                raise FileNotFoundError(
+                    f"Model file not found: {path}. Train the model or copy it into {self.model_dir}."
+                ) from None
+        return tuple(mtimes)
+
+    @profiled('model_load')
+    def _load(self):
+        if self.backend == 'numpy':
+            from fast_forest import load_model
+            return load_model(self.paths[0])
+        if self.backend == 'mmap':
+            from fast_forest import load_model
+            return load_model(os.path.dirname(self.paths[0]), mmap_mode='r')
+        if self.backend == 'surrogate':
+            from surrogate import load_surrogate
+            return load_surrogate(self.paths[0])
+        import joblib
+        return joblib.load(self.paths[0]), joblib.load(self.paths[1])
+
+    def snapshot(self):
+        # (scaler, model, version) of one load; use the version to key anything derived from the model
+        mtimes = self._mtimes()
+        loaded = self._loaded
+        if loaded is None or loaded[0] != mtimes:
+            with self._lock:
+                loaded = self._loaded
+                if loaded is None or loaded[0] != mtimes:
+                    # Profiles (when enabled) start afresh for every model version
+                    restart(f'model-v{self.version + 1}')
+                    scaler, model = self._load()
+                    loaded = self._loaded = (mtimes, scaler, model, self.version + 1)
+        return loaded[1:]
+
+    def get(self):
+        return self.snapshot()[:2]
+
+    def is_loaded(self):
+        return self._loaded is not None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    # Process-wide singleton shared by every Streamlit session and worker thread
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
+
+
+def get_model():
+    return get_registry().get()
+
+
+_preload_started = False
+
+
+def _preload(modules):
+    try:
+        for name in modules:
+            importlib.import_module(name)
+        get_registry().get()
+    except Exception:
+        # Not fatal: the first recommendation loads (and reports) it again
+        logger.warning("Model preload failed", exc_info=True)
+
+
+def preload(*modules):
+    # Once per process, import `modules` and load the model on a daemon thread
+    global _preload_started
+    if not PRELOAD or _preload_started:
+        return
+    with _registry_lock:
+        if _preload_started:
+            return
+        _preload_started = True
+    threading.Thread(target=_preload, args=(modules,), name='careerpath-preload', daemon=True).start()
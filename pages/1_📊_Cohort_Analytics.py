@@ -0,0 +1,60 @@
+import pandas as pd
+import streamlit as st
+
+from analytics import get_analytics
+
+# Career-match distributions read from the incremental aggregates in analytics.py,
+# never from the raw records, so each rerun costs the same whatever the cohort size.
+
+DIMENSIONS = {'Background': 'background', 'Gender': 'gender', 'Score band': 'score_band'}
+
+
+def main():
+    st.set_page_config(page_title="📊 Cohort Analytics", page_icon="📊", layout="wide")
+    st.title("📊 Cohort Analytics")
+
+    analytics = get_analytics()
+    periods = analytics.periods()
+    if not periods:
+        st.info("No student records have been saved yet.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        label = st.selectbox("Group by", list(DIMENSIONS), key="analytics_dimension")
+    with col2:
+        if len(periods) > 1:
+            start, end = st.select_slider("Months", options=periods, value=(periods[0], periods[-1]),
+                                          key="analytics_periods")
+        else:
+            start = end = periods[0]
+    dimension = DIMENSIONS[label]
+
+    groups = pd.DataFrame(analytics.summary([dimension], start, end))
+    if groups.empty:
+        st.info("No records in the selected months.")
+        return
+
+    total = int(groups['records'].sum())
+    scored = groups.dropna(subset=['mean_match_score'])
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Students", f"{total:,}")
+    col2.metric("Careers matched", groups['career'].nunique())
+    if not scored.empty:
+        weighted = (scored['mean_match_score'] * scored['records']).sum() / scored['records'].sum()
+        col3.metric("Mean match score", f"{weighted * 100:.1f}%")
+
+    st.subheader(f"Top career match by {label.lower()}")
+    counts = groups.pivot_table(index=dimension, columns='career', values='records', aggfunc='sum', fill_value=0)
+    st.bar_chart(counts)
+
+    st.subheader("Top career match over time")
+    trend = pd.DataFrame(analytics.summary(['period'], start, end))
+    st.line_chart(trend.pivot_table(index='period', columns='career', values='records', aggfunc='sum',
+                                    fill_value=0))
+
+    st.subheader(f"Mean match score (%) by {label.lower()}")
+    st.dataframe(scored.pivot_table(index=dimension, columns='career', values='mean_match_score').mul(100).round(1))
+
+
+main()
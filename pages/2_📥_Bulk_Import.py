@@ -0,0 +1,73 @@
+import io
+import os
+import tempfile
+
+import pandas as pd
+import streamlit as st
+
+from bulk_import import ImportJob, available_extensions, write_rejects
+from subject_mapping import subjects_by_background
+
+# Upload a school's score sheet and import it in a background thread; the
+# progress panel below is a fragment that re-polls the job every second, so the
+# page stays responsive while thousands of rows are scored and saved.
+
+
+def template_csv():
+    subjects = sorted({subject for names in subjects_by_background.values() for subject in names})
+    columns = ['Name', 'Age', 'Gender', 'Background', 'Part-Time Job', 'Extracurricular Activities',
+               'Weekly Study Hours'] + subjects
+    example = {'Name': 'Ayesha Khan', 'Age': 18, 'Gender': 'Female', 'Background': 'Pre-Medical',
+               'Part-Time Job': 'No', 'Extracurricular Activities': 'Yes', 'Weekly Study Hours': 15}
+    example.update({subject: 80 for subject in subjects_by_background['Pre-Medical']})
+    return pd.DataFrame([example], columns=columns).to_csv(index=False)
+
+
+@st.fragment(run_every="1s")
+def show_progress():
+    job = st.session_state.get('import_job')
+    if job is None:
+        return
+    st.progress(job.progress, text=f"{job.rows_read:,} rows read · {job.imported:,} imported · "
+                                   f"{job.rejected:,} rejected · {job.elapsed:.0f}s")
+    if job.state == 'running':
+        if st.button("Cancel import", key="cancel_import"):
+            job.cancel()
+    elif job.state == 'done':
+        st.success(f"✅ Imported {job.imported:,} students ({job.rejected:,} rows rejected)")
+    elif job.state == 'cancelled':
+        st.warning(f"Import cancelled after {job.imported:,} students")
+    elif job.state == 'failed':
+        st.error(f"❌ Import failed: {job.error}")
+
+    if job.rejects and job.state != 'running':
+        st.subheader("Rejected rows")
+        st.dataframe(pd.DataFrame(job.rejects, columns=['Row', 'Problems']), hide_index=True)
+        buf = io.StringIO()
+        write_rejects(buf, job.rejects)
+        st.download_button("📥 Download rejected rows", buf.getvalue(), "rejected_rows.csv", "text/csv",
+                           key="download_rejects")
+
+
+def main():
+    st.set_page_config(page_title="📥 Bulk Import", page_icon="📥", layout="wide")
+    st.title("📥 Bulk Import")
+    st.write("Upload a score sheet to get career predictions for a whole class at once. Scores, study "
+             "hours and ages must fall within the same ranges as the wizard.")
+    st.download_button("📄 Download template", template_csv(), "score_sheet_template.csv", "text/csv",
+                       key="download_template")
+
+    job = st.session_state.get('import_job')
+    running = job is not None and job.state == 'running'
+    uploaded = st.file_uploader("Score sheet", type=available_extensions(), key="import_file")
+    if st.button("Start import", key="start_import", disabled=uploaded is None or running):
+        # The worker streams from disk, so the upload is copied to a temporary file it removes when done
+        suffix = os.path.splitext(uploaded.name)[1]
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+            f.write(uploaded.getbuffer())
+        st.session_state.import_job = ImportJob(f.name, remove_file=True).start()
+
+    show_progress()
+
+
+main()
@@ -0,0 +1,60 @@
+import pandas as pd
+import streamlit as st
+
+from instrumentation import ENABLED, LOG_THRESHOLD_MS, get_metrics, session_metrics
+
+# Admin view of the timing spans recorded by instrumentation.py: which stages of
+# a request are slowest in this server process, and in the current session.
+
+COLUMNS = ['stage', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'total_s']
+ORDERINGS = {'p95 latency': 'p95_ms', 'p99 latency': 'p99_ms', 'Max latency': 'max_ms', 'Total time': 'total_s'}
+
+
+def stage_table(rows):
+    return pd.DataFrame(rows, columns=COLUMNS).set_index('stage').round(3)
+
+
+def main():
+    st.set_page_config(page_title="⏱️ Performance", page_icon="⏱️", layout="wide")
+    st.title("⏱️ Performance")
+    if not ENABLED:
+        st.warning("Instrumentation is disabled (CAREERPATH_INSTRUMENTATION=0).")
+        return
+
+    metrics = get_metrics()
+    col1, col2 = st.columns(2)
+    with col1:
+        ordering = st.selectbox("Rank stages by", list(ORDERINGS), key="perf_ordering")
+    with col2:
+        limit = st.slider("Stages to show", 3, 30, 10, key="perf_limit")
+    by = ORDERINGS[ordering]
+
+    st.subheader("Slowest stages in this server process")
+    slowest = metrics.slowest(by, limit)
+    if not slowest:
+        st.info("No requests have been timed yet. Open the recommender and get to the results step.")
+    else:
+        table = stage_table(slowest)
+        st.bar_chart(table[by])
+        st.dataframe(table)
+
+    st.subheader("This session")
+    mine = session_metrics(st.session_state).slowest(by, limit)
+    if mine:
+        st.dataframe(stage_table(mine))
+    else:
+        st.info("Nothing timed in this session yet.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("📥 Prometheus metrics", metrics.prometheus_text(), "careerpath_metrics.prom",
+                           "text/plain", key="download_metrics")
+    with col2:
+        if st.button("Reset process histograms", key="reset_metrics"):
+            metrics.reset()
+            st.rerun()
+    if LOG_THRESHOLD_MS is not None:
+        st.caption(f"Spans slower than {LOG_THRESHOLD_MS:g} ms are also logged to 'careerpath.spans'.")
+
+
+main()
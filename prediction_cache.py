@@ -0,0 +1,157 @@
+import logging
+import os
+import threading
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+from instrumentation import span
+
+# Process-wide LRU cache of predict_proba rows, keyed on the encoded 13-feature
+# tuple. Every input is a bounded integer (or derived from them), so identical
+# submissions -- Back/Next between steps 8 and 9, or many students leaving every
+# slider at 50 -- map to the same key. The cache is cleared whenever the model
+# registry loads a new model version.
+
+DEFAULT_SIZE = int(os.environ.get('CAREERPATH_PREDICTION_CACHE_SIZE', '4096'))
+WARM_ROWS = int(os.environ.get('CAREERPATH_PREDICTION_CACHE_WARM', '0'))
+
+logger = logging.getLogger(__name__)
+
+
+def feature_key(row):
+    # Round away float noise in the derived average so equal inputs share a key
+    return tuple(np.round(np.asarray(row, dtype=np.float64), 6).tolist())
+
+
+class PredictionCache:
+    def __init__(self, maxsize=DEFAULT_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_version = None
+
+    def _check_version(self, model_version):
+        # True if entries for model_version may be read and stored. Versions only
+        # grow, so a request still holding an older model bypasses the cache
+        # instead of clearing it back to that model.
+        if model_version != self._model_version:
+            if None not in (model_version, self._model_version) and model_version < self._model_version:
+                return False
+            self._entries.clear()
+            self._model_version = model_version
+        return True
+
+    def predict_proba(self, X, scaler, model, model_version=None, record_stats=True):
+        # Rows found in the cache are returned as-is; misses are predicted together
+        X = np.atleast_2d(X)
+        keys = [feature_key(row) for row in X]
+        result = [None] * len(keys)
+        missing = []
+        with self._lock:
+            current = self._check_version(model_version)
+            for i, key in enumerate(keys):
+                probabilities = self._entries.get(key) if current else None
+                if probabilities is None:
+                    missing.append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    result[i] = probabilities
+            if record_stats:
+                self.hits += len(keys) - len(missing)
+                self.misses += len(missing)
+
+        if missing:
+            with span('scaler.transform'):
+                scaled = scaler.transform(X[missing])
+            with span('predict_proba'):
+                computed = model.predict_proba(scaled)
+            computed.setflags(write=False)
+            with self._lock:
+                # Skip storing if a newer model was loaded while we were predicting
+                current = self._model_version == model_version
+                for i, probabilities in zip(missing, computed):
+                    result[i] = probabilities
+                    if current:
+                        self._store(keys[i], probabilities)
+        return np.vstack(result)
+
+    def _store(self, key, probabilities):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = probabilities
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+def most_frequent_features(store, top_n):
+    # Count encoded feature rows across all saved records, one chunk at a time
+    import pandas as pd
+    from recommender import RECORDS_SCHEMA, build_feature_matrix
+
+    counts = Counter()
+    for chunk in store.iter_rows():
+        df = pd.DataFrame(chunk).dropna(subset=RECORDS_SCHEMA['subjects'])
+        if df.empty:
+            continue
+        X = build_feature_matrix(df, RECORDS_SCHEMA)
+        counts.update(feature_key(row) for row in X)
+    return np.array([key for key, _ in counts.most_common(top_n)], dtype=np.float64)
+
+
+def warm_from_records(cache, top_n, store=None, registry=None):
+    from model_registry import get_registry
+    from storage import get_store
+
+    registry = registry or get_registry()
+    X = most_frequent_features(store or get_store(), top_n)
+    if len(X):
+        scaler, model, version = registry.snapshot()
+        # Warming should not count towards the live hit/miss statistics
+        cache.predict_proba(X, scaler, model, version, record_stats=False)
+    return len(X)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache():
+    # Shared by all sessions in the process; optionally warmed in the background
+    # from the most frequent rows in the record store (CAREERPATH_PREDICTION_CACHE_WARM)
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PredictionCache()
+                if WARM_ROWS > 0:
+                    threading.Thread(target=_warm_quietly, args=(_cache, WARM_ROWS),
+                                     name='prediction-cache-warm', daemon=True).start()
+    return _cache
+
+
+def _warm_quietly(cache, top_n):
+    try:
+        warm_from_records(cache, top_n)
+    except Exception:
+        # A missing model or store only means the cache starts cold
+        logger.warning("Prediction cache warm-up skipped", exc_info=True)
@@ -0,0 +1,392 @@
+import argparse
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Opt-in profiling of the hot path. With CAREERPATH_PROFILE=N the functions
+# decorated with @profiled(target) -- Recommendations(), model loading and
+# save_student_data() -- run their first N calls under a profiler that keeps
+# whole call stacks, so the output is a real flamegraph: collapsed stacks
+# (flamegraph.pl, inferno, speedscope) or speedscope JSON, rewritten in
+# CAREERPATH_PROFILE_DIR after every profiled call. Each newly loaded model
+# version starts a fresh set of files with a fresh budget, so the calls right
+# after a model swap are always captured. Unset (the default), @profiled
+# returns the function unchanged.
+#
+# CAREERPATH_PROFILE_MODE picks the profiler:
+#   sample -- a helper thread snapshots the calling thread's Python stack every
+#             CAREERPATH_PROFILE_INTERVAL_MS; cheap enough for production
+#   trace  -- sys.setprofile sees every Python and C call (NumPy, sklearn
+#             validation, ...) and measures exact self time, at several times
+#             the normal cost per call; stops tracing after MAX_TRACE_EVENTS
+#             and folds frames deeper than MAX_STACK_DEPTH into their ancestor
+
+PROFILE_CALLS = int(os.environ.get('CAREERPATH_PROFILE', '0'))
+PROFILE_DIR = os.environ.get('CAREERPATH_PROFILE_DIR',
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'))
+FORMATS = {'collapsed': '.collapsed.txt', 'speedscope': '.speedscope.json'}
+PROFILE_FORMAT = os.environ.get('CAREERPATH_PROFILE_FORMAT', 'speedscope').lower()
+if PROFILE_FORMAT not in FORMATS:
+    raise ValueError(f"CAREERPATH_PROFILE_FORMAT must be one of {', '.join(FORMATS)}")
+PROFILE_MODE = os.environ.get('CAREERPATH_PROFILE_MODE', 'sample').lower()
+SAMPLE_INTERVAL = float(os.environ.get('CAREERPATH_PROFILE_INTERVAL_MS', '1')) / 1000.0
+MAX_TRACE_EVENTS = 500000
+MAX_STACK_DEPTH = 48
+# Stands in for the rest of a traced call once MAX_TRACE_EVENTS is reached
+UNTRACED = '[untraced: event limit reached]'
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _c_name(function):
+    # builtins.len, numpy.asarray, ndarray.reshape, dict.get, ...
+    name = getattr(function, '__qualname__', None) or repr(function)
+    module = getattr(function, '__module__', None)
+    return f"{module}.{name}" if module and not name.startswith(module) else name
+
+
+class Profile:
+    # Time (seconds) per full call stack, summed over every profiled call.
+    # Subclasses implement run(); concurrent calls are merged under the lock.
+
+    def __init__(self, root):
+        self.root = root
+        self.stacks = Counter()
+        self.calls = 0
+        self.seconds = 0.0
+        # Calls whose profile stops before the call did (the tracer's event limit)
+        self.truncated = 0
+        self._lock = threading.Lock()
+
+    def _merge(self, collected, seconds):
+        with self._lock:
+            self.stacks.update(collected)
+            self.calls += 1
+            self.seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return Counter(self.stacks), self.calls
+
+    def description(self):
+        # "<root> (N calls)", flagged when some calls were only partly profiled
+        with self._lock:
+            calls, truncated = self.calls, self.truncated
+        if truncated:
+            return f'{self.root} ({calls} calls, {truncated} truncated at the event limit)'
+        return f'{self.root} ({calls} calls)'
+
+    def hotspots(self, n=10):
+        # Leaf frames with the most self time
+        stacks, _ = self.snapshot()
+        totals = Counter()
+        for stack, seconds in stacks.items():
+            totals[stack[-1]] += seconds
+        return totals.most_common(n)
+
+
+class TracingProfiler(Profile):
+    # Deterministic: sys.setprofile (per thread) reports every call and return.
+    # Unlike cProfile, which only keeps caller/callee pairs, whole stacks are kept.
+
+    def __init__(self, root, max_events=MAX_TRACE_EVENTS, max_depth=MAX_STACK_DEPTH):
+        super().__init__(root)
+        self.max_events = max_events
+        self.max_depth = max_depth
+
+    def run(self, fn, *args, **kwargs):
+        names = [self.root]
+        frames = []
+        collected = Counter()
+        clock = time.perf_counter
+        # [events, time spent inside the callback, when tracing stopped]; the
+        # callback time is taken off the clock so the profiler's own overhead is
+        # not charged to the code measured
+        state = [0, 0.0, None]
+        previous = sys.getprofile()
+
+        def close_frames(now):
+            # Charge every open frame up to `now`, innermost first
+            while frames:
+                frame_start, children = frames.pop()
+                elapsed = now - frame_start
+                collected[tuple(names[:self.max_depth])] += elapsed - children
+                names.pop()
+                if frames:
+                    frames[-1][1] += elapsed
+
+        def callback(frame, event, arg):
+            entered = clock()
+            now = entered - state[1]
+            if event == 'call' or event == 'c_call':
+                names.append(_frame_name(frame.f_code) if event == 'call' else _c_name(arg))
+                frames.append([now, 0.0])
+            elif frames and event in ('return', 'c_return', 'c_exception'):
+                start, children = frames.pop()
+                elapsed = now - start
+                collected[tuple(names[:self.max_depth])] += elapsed - children
+                names.pop()
+                if frames:
+                    frames[-1][1] += elapsed
+            state[0] += 1
+            if state[0] >= self.max_events:
+                # Keep the rest of the call fast. The open frames end here; the rest
+                # of the call is charged to UNTRACED, not to whichever frames were open
+                sys.setprofile(previous)
+                close_frames(now)
+                state[2] = now
+            state[1] += clock() - entered
+
+        start = clock()
+        sys.setprofile(callback)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sys.setprofile(previous)
+            end = clock() - state[1]
+            # Frames still open (the sys.setprofile call itself) get the time up to now
+            close_frames(end)
+            if state[2] is not None:
+                collected[(self.root, UNTRACED)] += end - state[2]
+                with self._lock:
+                    self.truncated += 1
+            self._merge(collected, end - start)
+
+
+_switch_lock = threading.Lock()
+_switch_state = {'active': 0, 'interval': None}
+
+
+def _sampling(on, interval):
+    # The sampler only runs when the profiled thread hands over the GIL, every
+    # 5 ms by default; shorten that while any sampling profile is active so
+    # samples are not biased towards C code that releases the GIL.
+    with _switch_lock:
+        if on:
+            if not _switch_state['active']:
+                _switch_state['interval'] = sys.getswitchinterval()
+                sys.setswitchinterval(min(_switch_state['interval'], interval / 4))
+            _switch_state['active'] += 1
+        else:
+            _switch_state['active'] -= 1
+            if not _switch_state['active']:
+                sys.setswitchinterval(_switch_state['interval'])
+
+
+class SamplingProfiler(Profile):
+    # Statistical: a helper thread reads the calling thread's current frame from
+    # sys._current_frames() every `interval` seconds and charges the time since
+    # its previous sample to that stack. Only Python frames are visible; time in
+    # C code (NumPy, the tree traversal) is charged to the Python frame calling it.
+
+    def __init__(self, root, interval=SAMPLE_INTERVAL):
+        super().__init__(root)
+        self.interval = interval
+
+    def run(self, fn, *args, **kwargs):
+        target = threading.get_ident()
+        anchor = sys._getframe()
+        collected = Counter()
+        stop = threading.Event()
+        clock = time.perf_counter
+
+        def sample():
+            last = clock()
+            while not stop.wait(self.interval):
+                frame = sys._current_frames().get(target)
+                now = clock()
+                stack = []
+                while frame is not None and frame is not anchor:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                # Stacks not under this call (fn already returned) are dropped
+                if frame is anchor and stack:
+                    stack = stack[::-1][:MAX_STACK_DEPTH - 1]
+                    collected[(self.root,) + tuple(stack)] += now - last
+                last = now
+
+        sampler = threading.Thread(target=sample, name=f'profile-{self.root}', daemon=True)
+        _sampling(True, self.interval)
+        start = clock()
+        sampler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            stop.set()
+            sampler.join()
+            _sampling(False, self.interval)
+            self._merge(collected, clock() - start)
+
+
+PROFILERS = {'sample': SamplingProfiler, 'trace': TracingProfiler}
+if PROFILE_MODE not in PROFILERS:
+    raise ValueError(f"CAREERPATH_PROFILE_MODE must be one of {', '.join(PROFILERS)}")
+
+
+def collapsed_text(stacks):
+    # One "frame;frame;frame <microseconds>" line per stack
+    lines = []
+    for stack, seconds in sorted(stacks.items()):
+        weight = int(round(seconds * 1e6))
+        if weight > 0:
+            lines.append(';'.join(name.replace(';', ',') for name in stack) + f' {weight}')
+    return '\n'.join(lines) + '\n'
+
+
+def speedscope_document(stacks, name):
+    frames, index, samples, weights = [], {}, [], []
+    for stack, seconds in sorted(stacks.items()):
+        weight = int(round(seconds * 1e6))
+        if weight <= 0:
+            continue
+        sample = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({'name': frame})
+            sample.append(index[frame])
+        samples.append(sample)
+        weights.append(weight)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'careerpath-profiling',
+        'shared': {'frames': frames},
+        'profiles': [{'type': 'sampled', 'name': name, 'unit': 'microseconds', 'startValue': 0,
+                      'endValue': sum(weights), 'samples': samples, 'weights': weights}],
+    }
+
+
+def write_profile(profiler, path, fmt=PROFILE_FORMAT):
+    stacks, _ = profiler.snapshot()
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        if fmt == 'speedscope':
+            json.dump(speedscope_document(stacks, profiler.description()), f)
+        else:
+            f.write(collapsed_text(stacks))
+    os.replace(tmp, path)
+    return path
+
+
+class _Session:
+    # Profilers for the current generation (one per model version), created on demand
+    def __init__(self):
+        self.generation = 'cold'
+        self.profilers = {}
+        self.lock = threading.Lock()
+
+    def claim(self, target):
+        # The profiler to use for this call, or None once the budget is spent
+        with self.lock:
+            profiler = self.profilers.get(target)
+            if profiler is None:
+                profiler = self.profilers[target] = PROFILERS[PROFILE_MODE](target)
+                profiler.budget = PROFILE_CALLS
+            if profiler.budget <= 0:
+                return None, None
+            profiler.budget -= 1
+            name = f'{target}-{self.generation}-{os.getpid()}{FORMATS[PROFILE_FORMAT]}'
+            return profiler, os.path.join(PROFILE_DIR, name)
+
+    def restart(self, generation):
+        with self.lock:
+            self.generation = generation
+            self.profilers = {}
+
+
+_session = _Session()
+
+
+def restart(generation):
+    # Called by the model registry whenever it loads a model version
+    if PROFILE_CALLS > 0:
+        _session.restart(generation)
+
+
+def profiled(target):
+    def decorate(fn):
+        if PROFILE_CALLS <= 0:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profiler, path = _session.claim(target)
+            if profiler is None:
+                return fn(*args, **kwargs)
+            try:
+                return profiler.run(fn, *args, **kwargs)
+            finally:
+                try:
+                    os.makedirs(PROFILE_DIR, exist_ok=True)
+                    write_profile(profiler, path)
+                except OSError:
+                    logger.warning("Could not write profile %s", path, exc_info=True)
+        return wrapper
+    return decorate
+
+
+def main(argv=None):
+    import tempfile
+
+    from benchmark import _student_args, synthetic_students
+    from model_registry import BACKEND_FILES, MODEL_BACKEND, MODEL_DIR, ModelRegistry
+    from ranking import predict_ranking
+    from recommender import SCORES_SCHEMA, SUBJECT_KEYS, build_feature_matrix, encode_student
+    from storage import SqliteRecordStore, build_record
+
+    parser = argparse.ArgumentParser(description="Profile model loading, single and batch predictions, and saves.")
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--backend', choices=list(BACKEND_FILES), default=MODEL_BACKEND)
+    parser.add_argument('--requests', type=int, default=200, help="Single-student predictions and saves to profile")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--batches', type=int, default=5)
+    parser.add_argument('--format', choices=list(FORMATS), default=PROFILE_FORMAT)
+    parser.add_argument('--mode', choices=list(PROFILERS), default=PROFILE_MODE)
+    parser.add_argument('-o', '--output-dir', default=PROFILE_DIR)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    students = synthetic_students(max(args.requests, args.batch_size))
+    rows = [_student_args(row) for row in students.head(args.requests).to_dict('records')]
+    batch = build_feature_matrix(students.head(args.batch_size), SCORES_SCHEMA)
+    profilers = {name: PROFILERS[args.mode](name) for name in ('model_load', 'recommendations', 'batch', 'save_record')}
+
+    registry = ModelRegistry(args.model_dir, args.backend)
+    scaler, model = profilers['model_load'].run(registry._load)
+    # Same path as Recommendations() without the prediction cache, which would hide the model
+    for row in rows:
+        profilers['recommendations'].run(lambda: predict_ranking(encode_student(*row), scaler, model))
+    for _ in range(args.batches):
+        profilers['batch'].run(predict_ranking, batch, scaler, model)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SqliteRecordStore(os.path.join(tmp, 'student_records.db'), legacy_csv=None)
+        for i, (gender, part_time, extra, hours, scores) in enumerate(rows):
+            record = build_record(f'Student {i}', 20, gender.title(), 'ICS', part_time, extra, hours,
+                                  {key: scores[key] for key in SUBJECT_KEYS + ['total', 'average']},
+                                  [('Software Engineer', 0.5)])
+            profilers['save_record'].run(store.append, record)
+
+    for name, profiler in profilers.items():
+        path = write_profile(profiler, os.path.join(args.output_dir, name + FORMATS[args.format]), args.format)
+        print(f"{name}: {profiler.calls} calls, {profiler.seconds / profiler.calls * 1000:.3f} ms per call "
+              f"(profiled) -> {path}")
+        if profiler.truncated:
+            print(f"    {profiler.truncated} of {profiler.calls} calls hit the {MAX_TRACE_EVENTS} event limit; "
+                  f"their remaining time is shown as {UNTRACED}")
+        for frame, seconds in profiler.hotspots(5):
+            print(f"    {seconds / profiler.seconds * 100:5.1f}%  {frame}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
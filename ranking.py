@@ -0,0 +1,94 @@
+import numpy as np
+
+from recommender import class_names
+
+# Top-k ranking over an (N, n_classes) predict_proba matrix. Only the k winners of
+# each row are sorted (argpartition first), and results stay columnar -- (N, k)
+# index and probability arrays -- so ranking a whole cohort is a handful of
+# vectorised NumPy calls instead of a Python loop per student.
+
+# Index -1 marks a slot cut by min_probability; it maps to the trailing '' name
+_NAMES = np.array(class_names + [''])
+
+# Career and probability come first so rec[0] / rec[1] read like the old (career, probability) tuples
+RANKED_DTYPE = np.dtype([
+    ('career', _NAMES.dtype),
+    ('probability', np.float64),
+    ('class_index', np.int16),
+])
+
+
+def _take_rows(values, idx):
+    # values[i, idx[i, j]] for every row, as one flat take (cheaper than take_along_axis)
+    offsets = np.arange(0, values.size, values.shape[1])[:, None]
+    return values.ravel().take(idx + offsets)
+
+
+def top_k(probabilities, k=3):
+    # Top-k class indices per row, best first; ties go to the lower class index
+    probabilities = np.ascontiguousarray(probabilities)
+    n_classes = probabilities.shape[1]
+    k = max(1, min(k, n_classes))
+    if k < n_classes:
+        # Partition ascending so the k largest land at the end, without negating the matrix
+        idx = np.argpartition(probabilities, n_classes - k, axis=1)[:, n_classes - k:]
+        idx.sort(axis=1)
+    else:
+        idx = np.broadcast_to(np.arange(n_classes), probabilities.shape).copy()
+    top = _take_rows(probabilities, idx)
+    # Only the k winners are sorted; stable, so equal probabilities keep class order
+    order = np.argsort(-top, axis=1, kind='stable')
+    return _take_rows(idx, order), _take_rows(top, order)
+
+
+class Ranking:
+    # Columnar ranking for N students: indices and probabilities are (N, k), best
+    # first. Slots below min_probability hold index -1 and probability NaN, and
+    # counts[i] is how many of row i's slots survived the cutoff.
+    def __init__(self, indices, probabilities, counts):
+        self.indices = indices
+        self.probabilities = probabilities
+        self.counts = counts
+
+    def __len__(self):
+        return len(self.indices)
+
+    @property
+    def k(self):
+        return self.indices.shape[1]
+
+    def careers(self):
+        # (N, k) array of career names, '' for cut slots
+        return _NAMES[self.indices]
+
+    def to_records(self):
+        # (N, k) structured array with RANKED_DTYPE fields
+        records = np.empty(self.indices.shape, dtype=RANKED_DTYPE)
+        records['career'] = self.careers()
+        records['probability'] = self.probabilities
+        records['class_index'] = self.indices
+        return records
+
+    def row(self, i):
+        # One student's surviving slots, best first, as a RANKED_DTYPE array
+        n = self.counts[i]
+        records = np.empty(n, dtype=RANKED_DTYPE)
+        records['career'] = _NAMES[self.indices[i, :n]]
+        records['probability'] = self.probabilities[i, :n]
+        records['class_index'] = self.indices[i, :n]
+        return records
+
+
+def rank(probabilities, k=3, min_probability=0.0):
+    idx, probs = top_k(probabilities, k)
+    # Rows are sorted best first, so the surviving slots are always a prefix
+    keep = probs >= min_probability
+    counts = keep.sum(axis=1)
+    if not keep.all():
+        idx = np.where(keep, idx, -1)
+        probs = np.where(keep, probs, np.nan)
+    return Ranking(idx, probs, counts)
+
+
+def predict_ranking(X, scaler, model, k=3, min_probability=0.0):
+    return rank(model.predict_proba(scaler.transform(X)), k, min_probability)
@@ -0,0 +1,81 @@
+import numpy as np
+
+from catalog import get_catalog
+
+# Career classes in the order of the model's predict_proba columns (catalog.json)
+class_names = list(get_catalog().class_names)
+
+# The 13 model features, in the order the scaler was fitted on
+FEATURE_COLUMNS = ['gender', 'part_time_job', 'extracurricular_activities',
+                   'weekly_self_study_hours', 'math_score', 'history_score',
+                   'physics_score', 'chemistry_score', 'biology_score',
+                   'english_score', 'geography_score', 'total_score', 'average_score']
+
+SUBJECT_KEYS = ['math', 'history', 'physics', 'chemistry', 'biology', 'english', 'geography']
+
+# Column names used by student-scores.csv (training data) and student_records.csv (app records)
+SCORES_SCHEMA = {
+    'gender': 'gender',
+    'part_time_job': 'part_time_job',
+    'extracurricular_activities': 'extracurricular_activities',
+    'weekly_self_study_hours': 'weekly_self_study_hours',
+    'subjects': [f'{key}_score' for key in SUBJECT_KEYS],
+}
+RECORDS_SCHEMA = {
+    'gender': 'Gender',
+    'part_time_job': 'Part-Time Job',
+    'extracurricular_activities': 'Extracurricular Activities',
+    'weekly_self_study_hours': 'Weekly Study Hours',
+    'subjects': ['Math', 'History', 'Physics', 'Chemistry', 'Biology', 'English', 'Geography'],
+}
+
+_TRUE_VALUES = {'yes', 'true', '1', 'y', 't'}
+
+
+def encode_student(gender, part_time_job, extracurricular_activities, weekly_self_study_hours, scores_dict):
+    # Encode categorical variables
+    gender_encoded = 1 if gender.lower() == 'female' else 0
+    part_time_job_encoded = 1 if part_time_job else 0
+    extracurricular_activities_encoded = 1 if extracurricular_activities else 0
+
+    # Create feature array with all 13 features (matching the scaler's expected input)
+    return np.array([[gender_encoded, part_time_job_encoded, extracurricular_activities_encoded,
+                      weekly_self_study_hours,
+                      scores_dict['math'], scores_dict['history'],
+                      scores_dict['physics'], scores_dict['chemistry'],
+                      scores_dict['biology'], scores_dict['english'],
+                      scores_dict['geography'], scores_dict['total'],
+                      scores_dict['average']]])
+
+
+def detect_schema(columns):
+    columns = set(columns)
+    for schema in (SCORES_SCHEMA, RECORDS_SCHEMA):
+        if set(schema['subjects']) <= columns and schema['gender'] in columns:
+            return schema
+    raise ValueError("Input does not match the student-scores.csv or student_records.csv schema")
+
+
+def _flag_column(series):
+    # Yes/No, TRUE/FALSE, 1/0 and real booleans all map to 1/0
+    if series.dtype == bool:
+        return series.to_numpy(dtype=np.float64)
+    values = series.astype(str).str.strip().str.lower()
+    return values.isin(_TRUE_VALUES).to_numpy(dtype=np.float64)
+
+
+def build_feature_matrix(df, schema=None):
+    # Build the (n, 13) feature matrix for a whole DataFrame in one step.
+    # Total and average are recomputed from the 7 subjects, the same way the app does.
+    schema = schema or detect_schema(df.columns)
+    n = len(df)
+    X = np.empty((n, len(FEATURE_COLUMNS)), dtype=np.float64)
+    X[:, 0] = (df[schema['gender']].astype(str).str.strip().str.lower() == 'female').to_numpy(dtype=np.float64)
+    X[:, 1] = _flag_column(df[schema['part_time_job']])
+    X[:, 2] = _flag_column(df[schema['extracurricular_activities']])
+    X[:, 3] = df[schema['weekly_self_study_hours']].to_numpy(dtype=np.float64)
+    X[:, 4:11] = df[schema['subjects']].to_numpy(dtype=np.float64)
+    X[:, 11] = X[:, 4:11].sum(axis=1)
+    X[:, 12] = X[:, 11] / len(SUBJECT_KEYS)
+    return X
+
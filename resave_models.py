@@ -38,3 +38,19 @@ for fname in FILES:
     print(f"Done for {src}\n")
 
 print('All done. Created backups and re-saved available model files.')
+
+# Also write the flattened forest as raw .npy arrays (model/forest/) so worker
+# processes can memory-map one shared copy instead of each unpickling model.pkl
+scaler_path = os.path.join(MODEL_DIR, 'scaler.pkl')
+model_path = os.path.join(MODEL_DIR, 'model.pkl')
+if os.path.isfile(scaler_path) and os.path.isfile(model_path):
+    from fast_forest import export_model_dir
+
+    forest_dir = os.path.join(MODEL_DIR, 'forest')
+    print(f"Writing memory-mappable forest arrays to {forest_dir}...")
+    with open(scaler_path, 'rb') as f:
+        scaler = pickle.load(f)
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    export_model_dir(scaler, model, forest_dir)
+    print('Done. Set CAREERPATH_MODEL_BACKEND=mmap to serve from it.')
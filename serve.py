@@ -0,0 +1,267 @@
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from instrumentation import get_metrics, span
+from model_registry import get_model
+from ranking import rank
+from recommender import SUBJECT_KEYS, encode_student
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+MAX_BODY_BYTES = 10 * 1024 * 1024
+# Accepted inputs, as the wizard's sliders allow
+STUDY_HOURS_RANGE = (0, 100)
+SCORE_RANGE = (0, 100)
+
+
+def predict_probabilities(X):
+    scaler, model = get_model()
+    with span('scaler.transform'):
+        X = scaler.transform(X)
+    with span('predict_proba'):
+        return model.predict_proba(X)
+
+
+class MicroBatcher:
+    # Collects rows submitted by concurrent request threads and runs them through
+    # predict_proba as one matrix, once max_batch_size rows are queued or the
+    # oldest request has waited max_wait_ms.
+
+    def __init__(self, predict_fn=predict_probabilities, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, X):
+        future = Future()
+        self._queue.put((X, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        items = [first]
+        rows = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the shutdown marker back so the loop exits after this batch
+                self._queue.put(None)
+                break
+            items.append(item)
+            rows += len(item[0])
+        return items
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            items = self._collect(first)
+            try:
+                with span('serve.batch'):
+                    probabilities = self.predict_fn(np.vstack([X for X, _ in items]))
+            except Exception as e:
+                if len(items) == 1:
+                    items[0][1].set_exception(e)
+                else:
+                    # Rescore one request at a time, so only the bad one fails
+                    for X, future in items:
+                        self._predict_one(X, future)
+                continue
+
+            self.batches += 1
+            self.rows += len(probabilities)
+            start = 0
+            for X, future in items:
+                future.set_result(probabilities[start:start + len(X)])
+                start += len(X)
+
+    def _predict_one(self, X, future):
+        try:
+            probabilities = self.predict_fn(X)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(probabilities)
+        future.set_result(probabilities)
+
+
+def _number(value, name, bounds):
+    number = float(value)
+    # NaN fails both comparisons, inf the upper or lower one
+    if not bounds[0] <= number <= bounds[1]:
+        raise ValueError(f"{name} must be between {bounds[0]} and {bounds[1]}, got {value!r}")
+    return number
+
+
+def _student_row(student):
+    # Same encoding as Recommendations(); total and average are derived if not given
+    scores = student['scores']
+    scores_dict = {key: _number(scores[key], key, SCORE_RANGE) for key in SUBJECT_KEYS}
+    n = len(SUBJECT_KEYS)
+    scores_dict['total'] = _number(scores.get('total', sum(scores_dict.values())), 'total',
+                                   (SCORE_RANGE[0] * n, SCORE_RANGE[1] * n))
+    scores_dict['average'] = _number(scores.get('average', scores_dict['total'] / n), 'average', SCORE_RANGE)
+    return encode_student(student['gender'], student.get('part_time_job', False),
+                          student.get('extracurricular_activities', False),
+                          _number(student['weekly_self_study_hours'], 'weekly_self_study_hours',
+                                  STUDY_HOURS_RANGE), scores_dict)
+
+
+def _ranked(probabilities, k, min_probability=0.0):
+    ranking = rank(probabilities, k, min_probability)
+    return [
+        [{'career': str(career), 'probability': float(p)} for career, p, _ in ranking.row(i)]
+        for i in range(len(ranking))
+    ]
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    server_version = 'CareerPathServe/1.0'
+    batcher = None
+    quiet = False
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            raise ValueError("Request body must be a JSON document under 10 MB")
+        return json.loads(self.rfile.read(length))
+
+    def _send_text(self, status, text, content_type='text/plain; version=0.0.4; charset=utf-8'):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'batches': self.batcher.batches, 'rows': self.batcher.rows})
+        elif self.path == '/metrics':
+            # Prometheus text format: per-stage latency histograms of this process
+            self._send_text(200, get_metrics().prometheus_text())
+        else:
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path not in ('/predict', '/predict/batch'):
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+            return
+        with span(f'serve.{self.path.strip("/").replace("/", ".")}'):
+            self._predict()
+
+    def _predict(self):
+        try:
+            payload = self._read_json()
+            k = int(payload.get('top_k', 3))
+            min_probability = float(payload.get('min_probability', 0.0))
+            if self.path == '/predict':
+                X = _student_row(payload)
+            else:
+                students = payload['students']
+                if not students:
+                    self._send_json(200, {'results': []})
+                    return
+                X = np.vstack([_student_row(student) for student in students])
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self._send_json(400, {'error': f"Invalid request: {e!r}"})
+            return
+
+        try:
+            probabilities = self.batcher.submit(X).result()
+        except FileNotFoundError as e:
+            self._send_json(503, {'error': str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': f"Prediction failed: {e}"})
+            return
+
+        ranked = _ranked(probabilities, k, min_probability)
+        if self.path == '/predict':
+            self._send_json(200, {'recommendations': ranked[0]})
+        else:
+            self._send_json(200, {'results': [{'recommendations': r} for r in ranked]})
+
+
+class PredictionServer(ThreadingHTTPServer):
+    # The socketserver default backlog of 5 resets connections under concurrent load
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def make_server(host='127.0.0.1', port=8000, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                max_wait_ms=DEFAULT_MAX_WAIT_MS, quiet=False):
+    batcher = MicroBatcher(max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    handler = type('Handler', (PredictionHandler,), {'batcher': batcher, 'quiet': quiet})
+    server = PredictionServer((host, port), handler)
+    server.batcher = batcher
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP/JSON inference service for the career model.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help="Maximum rows per predict_proba call")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="Longest a request waits for others to join its batch")
+    parser.add_argument('--quiet', action='store_true', help="Disable per-request access logging")
+    args = parser.parse_args(argv)
+
+    # Fail fast if the model is missing rather than on the first request
+    get_model()
+
+    server = make_server(args.host, args.port, args.max_batch_size, args.max_wait_ms, args.quiet)
+    print(f"Serving on http://{args.host}:{args.port} (max batch {args.max_batch_size}, "
+          f"max wait {args.max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
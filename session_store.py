@@ -0,0 +1,322 @@
+import json
+import os
+import queue
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+
+from storage import DATA_DIR
+
+# Server-side wizard state. Each session keeps one slotted WizardState instead of
+# nine st.session_state keys. The state lives in a process-wide store keyed by a
+# random session id that is carried in the URL (?session=...), so a student who
+# reconnects, or whose worker was restarted (with the SQLite store), picks up
+# where they left off. Idle wizards are evicted after CAREERPATH_SESSION_TTL
+# seconds; the in-memory store also keeps at most CAREERPATH_SESSION_MAX of them.
+#
+# The ?session= link is a bearer token: whoever has it can read and continue
+# that student's answers. Every browser session works on its own copy, and a
+# save that finds the wizard changed by someone else moves this browser to a
+# new id instead of overwriting it. CAREERPATH_SESSION_LINKS=0 turns resume
+# links off (e.g. on shared lab computers); wizards then last one browser session.
+
+SESSION_BACKEND = os.environ.get('CAREERPATH_SESSION_STORE', 'memory').lower()
+SESSION_TTL = float(os.environ.get('CAREERPATH_SESSION_TTL', str(6 * 3600)))
+SESSION_MAX = int(os.environ.get('CAREERPATH_SESSION_MAX', '10000'))
+SESSION_LINKS = os.environ.get('CAREERPATH_SESSION_LINKS', '1') != '0'
+SESSIONS_DB = os.path.join(DATA_DIR, 'wizard_sessions.db')
+QUERY_PARAM = 'session'
+# "wizard" asks one question per page; "express" asks everything in one form.
+# ?mode= in the URL overrides the default for that student.
+UI_MODES = ('wizard', 'express')
+DEFAULT_UI_MODE = os.environ.get('CAREERPATH_UI_MODE', 'wizard').lower()
+_SESSION_ID = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+_UNSET = object()
+
+
+@dataclass(slots=True)
+class WizardState:
+    step: int = 1
+    name: str = ""
+    age: int = None
+    gender: str = "Male"
+    background: str = "Pre-Medical"
+    part_time_job: bool = False
+    extracurricular_activities: bool = False
+    weekly_self_study_hours: int = 5
+    # subject key -> score, filled in by step 8 (set with set_score)
+    scores: dict = field(default_factory=dict)
+    # Not saved: whether an answer changed since the wizard was loaded or saved,
+    # and the store's revision of it then (0 for one never saved)
+    dirty: bool = field(default=False, init=False, repr=False, compare=False)
+    revision: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        # Widgets assign their answer on every rerun; only a new value marks it dirty
+        if name not in ('dirty', 'revision') and getattr(self, name, _UNSET) != value:
+            object.__setattr__(self, 'dirty', True)
+        object.__setattr__(self, name, value)
+
+    def set_score(self, key, value):
+        if self.scores.get(key) != value:
+            self.scores = {**self.scores, key: value}
+
+    @classmethod
+    def _saved_fields(cls):
+        return [f.name for f in fields(cls) if f.init]
+
+    def reset(self):
+        fresh = WizardState()
+        for name in self._saved_fields():
+            setattr(self, name, getattr(fresh, name))
+
+    def to_json(self):
+        return json.dumps([getattr(self, name) for name in self._saved_fields()], separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, text, revision=0):
+        values = json.loads(text)
+        names = cls._saved_fields()
+        if not isinstance(values, list) or len(values) != len(names):
+            raise ValueError("Saved wizard state does not match WizardState")
+        state = cls(**dict(zip(names, values)))
+        state.revision = revision
+        return state
+
+
+def ui_mode(query_params):
+    mode = query_params.get('mode', DEFAULT_UI_MODE)
+    return mode if mode in UI_MODES else UI_MODES[0]
+
+
+def new_session_id():
+    return secrets.token_urlsafe(16)
+
+
+def valid_session_id(session_id):
+    return bool(session_id) and _SESSION_ID.match(session_id) is not None
+
+
+class MemorySessionStore:
+    # LRU of (last seen, wizard state as JSON, revision), so every get() hands out a fresh copy.
+    # Reading or saving a session moves it to the end, so the front always holds
+    # the idlest sessions and eviction stops at the first one still within its TTL.
+
+    def __init__(self, max_sessions=SESSION_MAX, ttl=SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._sessions:
+            session_id, (last_seen, _, _) = next(iter(self._sessions.items()))
+            if now - last_seen < self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if now - entry[0] >= self.ttl:
+                del self._sessions[session_id]
+                return None
+            self._sessions[session_id] = (now,) + entry[1:]
+            self._sessions.move_to_end(session_id)
+        return WizardState.from_json(entry[1], entry[2])
+
+    def put(self, session_id, state):
+        # Compare-and-set on state.revision: saves, and bumps the revision, unless
+        # someone else saved this wizard since this copy was loaded. Returns False then.
+        now = time.monotonic()
+        saved = state.to_json()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and entry[2] != state.revision and now - entry[0] < self.ttl:
+                return False
+            self._sessions[session_id] = (now, saved, state.revision + 1)
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+        state.revision += 1
+        state.dirty = False
+        return True
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def evict_expired(self):
+        with self._lock:
+            before = len(self._sessions)
+            self._evict(time.monotonic())
+            return before - len(self._sessions)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SqliteSessionStore:
+    # One row per session with the state as compact JSON, so sessions outlive
+    # the worker process and are shared by workers on the same disk. Expired
+    # rows are deleted at most once per `evict_every` seconds, on a save.
+
+    def __init__(self, path=SESSIONS_DB, ttl=SESSION_TTL, pool_size=8, evict_every=60.0):
+        self.path = path
+        self.ttl = ttl
+        self.evict_every = evict_every
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._last_evict = 0.0
+        with self.connection() as conn, conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS wizard_sessions '
+                         '(id TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL, '
+                         'revision INTEGER NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_updated ON wizard_sessions (updated)')
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=30000')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def get(self, session_id):
+        with self.connection() as conn:
+            row = conn.execute('SELECT state, revision FROM wizard_sessions WHERE id = ? AND updated > ?',
+                               (session_id, time.time() - self.ttl)).fetchone()
+        if row is None:
+            return None
+        try:
+            return WizardState.from_json(*row)
+        except (ValueError, TypeError):
+            # Written by an incompatible version; start that student afresh
+            return None
+
+    def put(self, session_id, state):
+        # Compare-and-set on state.revision, as in MemorySessionStore.put
+        now = time.time()
+        saved = state.to_json()
+        revision = state.revision + 1
+        with self.connection() as conn, conn:
+            updated = conn.execute('UPDATE wizard_sessions SET state = ?, updated = ?, revision = ? '
+                                   'WHERE id = ? AND (revision = ? OR updated <= ?)',
+                                   (saved, now, revision, session_id, state.revision, now - self.ttl)).rowcount
+            if not updated:
+                # Missing (new or evicted) rows are inserted; a changed row is left alone
+                updated = conn.execute('INSERT OR IGNORE INTO wizard_sessions (id, state, updated, revision) '
+                                       'VALUES (?, ?, ?, ?)', (session_id, saved, now, revision)).rowcount
+        if updated:
+            state.revision = revision
+            state.dirty = False
+        if now - self._last_evict >= self.evict_every:
+            self._last_evict = now
+            self.evict_expired()
+        return bool(updated)
+
+    def delete(self, session_id):
+        with self.connection() as conn, conn:
+            conn.execute('DELETE FROM wizard_sessions WHERE id = ?', (session_id,))
+
+    def evict_expired(self):
+        with self.connection() as conn, conn:
+            return conn.execute('DELETE FROM wizard_sessions WHERE updated <= ?',
+                                (time.time() - self.ttl,)).rowcount
+
+    def __len__(self):
+        with self.connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM wizard_sessions').fetchone()[0]
+
+
+_session_store = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store():
+    # Process-wide store selected by CAREERPATH_SESSION_STORE ("memory" by default, or "sqlite")
+    global _session_store
+    if _session_store is None:
+        with _session_store_lock:
+            if _session_store is None:
+                if SESSION_BACKEND == 'memory':
+                    _session_store = MemorySessionStore()
+                elif SESSION_BACKEND == 'sqlite':
+                    _session_store = SqliteSessionStore()
+                else:
+                    raise ValueError(f"Unknown CAREERPATH_SESSION_STORE backend: {SESSION_BACKEND}")
+    return _session_store
+
+
+@contextmanager
+def wizard_session(session_state, query_params, store=None):
+    # Yields this session's WizardState and saves it when the rerun changed it.
+    # The object is cached in st.session_state, so the store is only read when a
+    # browser session starts or comes back with a ?session= link, and only
+    # written when the state is dirty.
+    # Not `store or ...`: an empty store is falsy (__len__)
+    store = store if store is not None else get_session_store()
+    session_id = query_params.get(QUERY_PARAM) if SESSION_LINKS else session_state.get('_wizard_id')
+    state = session_state.get('_wizard')
+    if state is None or session_state.get('_wizard_id') != session_id:
+        state = store.get(session_id) if valid_session_id(session_id) else None
+        if state is None:
+            session_id = new_session_id()
+            state = WizardState()
+            # Saved at the end of this run, so the new link resumes straight away
+            state.dirty = True
+            if SESSION_LINKS:
+                query_params[QUERY_PARAM] = session_id
+        session_state['_wizard'] = state
+        session_state['_wizard_id'] = session_id
+    try:
+        yield state
+    finally:
+        # Also runs when the page calls st.rerun(), which unwinds through here
+        if state.dirty and not store.put(session_id, state):
+            # Another browser with the same link saved first: keep theirs, fork ours
+            session_id = new_session_id()
+            state.revision = 0
+            store.put(session_id, state)
+            session_state['_wizard_id'] = session_id
+            if SESSION_LINKS:
+                query_params[QUERY_PARAM] = session_id
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Wizard session store maintenance (SQLite backend).")
+    parser.add_argument('command', choices=['count', 'evict'])
+    parser.add_argument('--db', default=SESSIONS_DB)
+    parser.add_argument('--ttl', type=float, default=SESSION_TTL, help="Seconds a wizard may sit unchanged")
+    args = parser.parse_args(argv)
+
+    store = SqliteSessionStore(args.db, ttl=args.ttl)
+    if args.command == 'evict':
+        print(f"Evicted {store.evict_expired()} expired sessions")
+    print(f"{len(store)} sessions in {args.db}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
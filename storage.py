@@ -0,0 +1,353 @@
+import csv
+import io
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# Student records live next to the app unless CAREERPATH_DATA_DIR says otherwise
+DATA_DIR = os.environ.get('CAREERPATH_DATA_DIR', os.path.dirname(os.path.abspath(__file__)))
+RECORDS_CSV = os.path.join(DATA_DIR, 'student_records.csv')
+RECORDS_DB = os.path.join(DATA_DIR, 'student_records.db')
+# PRAGMA user_version of a fully created (and, if new, CSV-imported) database
+SCHEMA_VERSION = 1
+
+# CSV header (kept for compatibility) and the matching SQLite column names and types
+FIELDNAMES = ['Timestamp', 'Name', 'Age', 'Gender', 'Background', 'Part-Time Job',
+              'Extracurricular Activities', 'Weekly Study Hours', 'Math', 'History', 'Physics',
+              'Chemistry', 'Biology', 'English', 'Geography', 'Total Score', 'Average Score',
+              'Top Career Match', 'Career Match Score']
+COLUMNS = [
+    ('timestamp', 'TEXT'), ('name', 'TEXT'), ('age', 'INTEGER'), ('gender', 'TEXT'),
+    ('background', 'TEXT'), ('part_time_job', 'TEXT'), ('extracurricular_activities', 'TEXT'),
+    ('weekly_study_hours', 'NUMERIC'), ('math', 'NUMERIC'), ('history', 'NUMERIC'), ('physics', 'NUMERIC'),
+    ('chemistry', 'NUMERIC'), ('biology', 'NUMERIC'), ('english', 'NUMERIC'), ('geography', 'NUMERIC'),
+    ('total_score', 'NUMERIC'), ('average_score', 'NUMERIC'), ('top_career_match', 'TEXT'),
+    ('career_match_score', 'TEXT'),
+]
+COLUMN_NAMES = [name for name, _ in COLUMNS]
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Older rows in student_records.csv were saved by spreadsheet tools as e.g. 12/6/2025 0:17
+_TIMESTAMP_FORMATS = (TIMESTAMP_FORMAT, "%Y-%m-%d %H:%M", "%m/%d/%Y %H:%M", "%m/%d/%Y %H:%M:%S", "%Y-%m-%d")
+
+
+def parse_timestamp(value):
+    if isinstance(value, datetime):
+        return value
+    value = (value or '').strip()
+    for fmt in _TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def normalize_timestamp(value):
+    parsed = parse_timestamp(value)
+    return parsed.strftime(TIMESTAMP_FORMAT) if parsed else value
+
+
+def _date_bounds(start, end):
+    # Inclusive date range -> half-open timestamp strings, comparable as text
+    lower = start.strftime(TIMESTAMP_FORMAT) if start else None
+    upper = (end + timedelta(days=1)).strftime(TIMESTAMP_FORMAT) if end else None
+    return lower, upper
+
+
+def build_record(name, age, gender, background, part_time_job, extracurricular, study_hours, scores_dict, model_recommendations):
+    # One student_records row, keyed by the CSV header
+    return {
+        'Timestamp': datetime.now().strftime(TIMESTAMP_FORMAT),
+        'Name': name,
+        'Age': age,
+        'Gender': gender,
+        'Background': background,
+        'Part-Time Job': 'Yes' if part_time_job else 'No',
+        'Extracurricular Activities': 'Yes' if extracurricular else 'No',
+        'Weekly Study Hours': study_hours,
+        'Math': scores_dict.get('math', 0),
+        'History': scores_dict.get('history', 0),
+        'Physics': scores_dict.get('physics', 0),
+        'Chemistry': scores_dict.get('chemistry', 0),
+        'Biology': scores_dict.get('biology', 0),
+        'English': scores_dict.get('english', 0),
+        'Geography': scores_dict.get('geography', 0),
+        'Total Score': scores_dict.get('total', 0),
+        'Average Score': scores_dict.get('average', 0),
+        # len(), not truthiness: recommendations may be a ranking.RANKED_DTYPE array
+        'Top Career Match': model_recommendations[0][0] if len(model_recommendations) else 'N/A',
+        'Career Match Score': f"{model_recommendations[0][1]*100:.1f}%" if len(model_recommendations) else 'N/A'
+    }
+
+
+def _is_blank(row):
+    return not any((value or '').strip() for value in row.values())
+
+
+class RecordStore:
+    # Backend interface: append records, iterate them in insertion order
+    # (optionally filtered by an inclusive date range and backgrounds), and
+    # export them in the legacy CSV layout.
+    path = None
+
+    def append(self, row):
+        raise NotImplementedError
+
+    def append_many(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def count(self):
+        raise NotImplementedError
+
+    def iter_rows(self, chunk_size=1000, start=None, end=None, backgrounds=None):
+        raise NotImplementedError
+
+    def iter_log(self, after=0, chunk_size=1000):
+        # (position, rows) chunks of records appended after `after`; position is the
+        # log position of the chunk's last row and can be passed back as `after`
+        raise NotImplementedError
+
+    def export_csv(self, f, **filters):
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        for chunk in self.iter_rows(**filters):
+            writer.writerows(chunk)
+
+
+class CsvRecordStore(RecordStore):
+    # Append-only CSV. Each record is written with a single write() call under a
+    # lock, so concurrent sessions in one process cannot interleave partial rows.
+
+    def __init__(self, path=RECORDS_CSV):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _format(rows, header=False):
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=FIELDNAMES, extrasaction='ignore')
+        if header:
+            writer.writeheader()
+        writer.writerows(rows)
+        return buf.getvalue()
+
+    def append_many(self, rows):
+        with self._lock:
+            header = not os.path.isfile(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, 'a', newline='', encoding='utf-8') as f:
+                f.write(self._format(rows, header))
+
+    def append(self, row):
+        self.append_many([row])
+
+    def iter_rows(self, chunk_size=1000, start=None, end=None, backgrounds=None):
+        if not os.path.isfile(self.path):
+            return
+        lower, upper = _date_bounds(start, end)
+        with open(self.path, newline='', encoding='utf-8') as f:
+            chunk = []
+            for row in csv.DictReader(f):
+                if _is_blank(row):
+                    continue
+                if backgrounds and row['Background'] not in backgrounds:
+                    continue
+                if lower or upper:
+                    timestamp = normalize_timestamp(row['Timestamp'])
+                    if (lower and timestamp < lower) or (upper and timestamp >= upper):
+                        continue
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+    def iter_log(self, after=0, chunk_size=1000):
+        # Positions count non-blank data rows, which only ever get appended
+        position = 0
+        chunk = []
+        for rows in self.iter_rows(chunk_size):
+            for row in rows:
+                position += 1
+                if position <= after:
+                    continue
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    yield position, chunk
+                    chunk = []
+        if chunk:
+            yield position, chunk
+
+    def count(self):
+        return sum(len(chunk) for chunk in self.iter_rows())
+
+
+class SqliteRecordStore(RecordStore):
+    # SQLite in WAL mode: readers never block the writer, inserts are constant
+    # time, and a small connection pool is shared by all sessions in the process.
+
+    def __init__(self, path=RECORDS_DB, pool_size=8, legacy_csv=RECORDS_CSV):
+        self.path = path
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._create_schema(legacy_csv)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=30000')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def _create_schema(self, legacy_csv=None):
+        # One write transaction, marked done by user_version: when several workers
+        # open a new database at once, only the first creates it and imports the CSV
+        columns = ', '.join(f'{name} {kind}' for name, kind in COLUMNS)
+        with self.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+                    existed = conn.execute("SELECT 1 FROM sqlite_master "
+                                           "WHERE type = 'table' AND name = 'student_records'").fetchone()
+                    conn.execute(f'CREATE TABLE IF NOT EXISTS student_records '
+                                 f'(id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})')
+                    conn.execute('CREATE INDEX IF NOT EXISTS idx_records_timestamp ON student_records (timestamp)')
+                    conn.execute('CREATE INDEX IF NOT EXISTS idx_records_background ON student_records (background)')
+                    conn.execute('CREATE INDEX IF NOT EXISTS idx_records_top_career ON student_records (top_career_match)')
+                    # Databases from before the marker already hold the imported records
+                    if not existed and legacy_csv and os.path.isfile(legacy_csv):
+                        for chunk in CsvRecordStore(legacy_csv).iter_rows():
+                            self._insert(conn, chunk)
+                    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def _insert(self, conn, rows):
+        placeholders = ', '.join('?' for _ in COLUMNS)
+        # Timestamps are stored in one sortable format so date-range filters can use the index
+        values = [(normalize_timestamp(row.get('Timestamp')),) + tuple(row.get(field) for field in FIELDNAMES[1:])
+                  for row in rows]
+        conn.executemany(f'INSERT INTO student_records ({", ".join(COLUMN_NAMES)}) '
+                         f'VALUES ({placeholders})', values)
+
+    def append_many(self, rows):
+        with self.connection() as conn, conn:
+            self._insert(conn, rows)
+
+    def append(self, row):
+        self.append_many([row])
+
+    def import_csv(self, csv_path, chunk_size=1000):
+        legacy = CsvRecordStore(csv_path)
+        for chunk in legacy.iter_rows(chunk_size):
+            self.append_many(chunk)
+
+    def count(self):
+        with self.connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM student_records').fetchone()[0]
+
+    def iter_rows(self, chunk_size=1000, start=None, end=None, backgrounds=None):
+        # Keyset pagination on id keeps each query cheap and memory bounded
+        conditions, params = ['id > ?'], []
+        lower, upper = _date_bounds(start, end)
+        if lower:
+            conditions.append('timestamp >= ?')
+            params.append(lower)
+        if upper:
+            conditions.append('timestamp < ?')
+            params.append(upper)
+        if backgrounds:
+            conditions.append(f'background IN ({", ".join("?" for _ in backgrounds)})')
+            params.extend(backgrounds)
+        query = (f'SELECT id, {", ".join(COLUMN_NAMES)} FROM student_records '
+                 f'WHERE {" AND ".join(conditions)} ORDER BY id LIMIT ?')
+        last_id = 0
+        while True:
+            with self.connection() as conn:
+                rows = conn.execute(query, [last_id] + params + [chunk_size]).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [dict(zip(FIELDNAMES, row[1:])) for row in rows]
+
+    def iter_log(self, after=0, chunk_size=1000):
+        # Positions are row ids
+        query = (f'SELECT id, {", ".join(COLUMN_NAMES)} FROM student_records '
+                 f'WHERE id > ? ORDER BY id LIMIT ?')
+        while True:
+            with self.connection() as conn:
+                rows = conn.execute(query, (after, chunk_size)).fetchall()
+            if not rows:
+                return
+            after = rows[-1][0]
+            yield after, [dict(zip(FIELDNAMES, row[1:])) for row in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    # Process-wide store selected by CAREERPATH_STORE ("sqlite" by default, or "csv")
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = os.environ.get('CAREERPATH_STORE', 'sqlite').lower()
+                if backend == 'csv':
+                    _store = CsvRecordStore()
+                elif backend == 'sqlite':
+                    _store = SqliteRecordStore()
+                else:
+                    raise ValueError(f"Unknown CAREERPATH_STORE backend: {backend}")
+    return _store
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Student record store maintenance.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    export = sub.add_parser('export', help="Write all records in the legacy CSV layout")
+    export.add_argument('output', nargs='?', default=RECORDS_CSV)
+    imp = sub.add_parser('import', help="Append records from a student_records.csv file")
+    imp.add_argument('input')
+    args = parser.parse_args(argv)
+
+    store = get_store()
+    if args.command == 'export':
+        if os.path.abspath(args.output) == os.path.abspath(store.path):
+            raise SystemExit("Refusing to export the store onto itself")
+        with open(args.output, 'w', newline='', encoding='utf-8') as f:
+            store.export_csv(f)
+        print(f"Exported {store.count()} records -> {args.output}")
+    else:
+        before = store.count()
+        for chunk in CsvRecordStore(args.input).iter_rows():
+            store.append_many(chunk)
+        print(f"Imported {store.count() - before} records from {args.input}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
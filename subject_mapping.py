@@ -0,0 +1,139 @@
+import numpy as np
+
+from recommender import SUBJECT_KEYS
+from subjects import MODEL_LAYOUT, MODEL_SUBJECTS, subjects_by_background
+
+# Declarative mapping, per subject layout: model feature -> {subject: weight}.
+# Weights for a feature are normalised to sum to 1, so several subjects can be
+# averaged into one feature. Features a layout does not list get DEFAULT_SCORE,
+# the wizard's starting slider value.
+FEATURE_MAPPING = {
+    'ICS': {
+        'math': {'Mathematics': 1.0},
+        'physics': {'Physics': 1.0},
+        'english': {'English': 1.0},
+        'geography': {'Motal-e-Quran': 1.0},
+    },
+    'Pre-Medical': {
+        'math': {'Mathematics': 1.0},
+        'chemistry': {'Chemistry': 1.0},
+        'biology': {'Biology': 1.0},
+        'english': {'English': 1.0},
+        'geography': {'Motal-e-Quran': 1.0},
+    },
+    'Pre-Engineering': {
+        'math': {'Mathematics': 1.0},
+        'physics': {'Physics': 1.0},
+        'chemistry': {'Chemistry': 1.0},
+        'english': {'English': 1.0},
+        'geography': {'Motal-e-Quran': 1.0},
+    },
+    'Arts': {
+        'math': {'General Mathematics': 1.0},
+        'history': {'English Literature': 1.0},
+        'biology': {'Psychology': 1.0},
+        'english': {'English': 1.0},
+        'geography': {'Motal-e-Quran': 1.0},
+    },
+    'Commerce': {
+        'math': {'Mathematics': 1.0},
+        'physics': {'Statistics': 1.0},
+        'chemistry': {'Economics': 1.0},
+        'english': {'English': 1.0},
+        'geography': {'Motal-e-Quran': 1.0},
+    },
+    MODEL_LAYOUT: {feature: {subject: 1.0} for feature, subject in zip(SUBJECT_KEYS, MODEL_SUBJECTS)},
+}
+DEFAULT_SCORE = 50
+
+
+def subject_key(subject):
+    # Session-state key the wizard uses for a subject slider
+    return subject.lower().replace(' ', '_')
+
+
+class SubjectMapping:
+    # FEATURE_MAPPING compiled to arrays: weights[l] is a (subjects, 7) matrix and
+    # bias[l] holds DEFAULT_SCORE for the features layout l leaves unmapped. A
+    # batch of rows from mixed layouts is projected with one matrix product.
+
+    def __init__(self, table, default_score=DEFAULT_SCORE):
+        self.layouts = list(table)
+        self.layout_index = {layout: i for i, layout in enumerate(self.layouts)}
+        self.subjects = sorted({subject_key(subject) for mapping in table.values()
+                                for weights in mapping.values() for subject in weights})
+        self.subject_index = {subject: i for i, subject in enumerate(self.subjects)}
+        self.default_score = default_score
+
+        n_layouts, n_subjects, n_features = len(self.layouts), len(self.subjects), len(SUBJECT_KEYS)
+        self.weights = np.zeros((n_layouts, n_subjects, n_features))
+        self.bias = np.full((n_layouts, n_features), float(default_score))
+        for l, layout in enumerate(self.layouts):
+            for feature, weights in table[layout].items():
+                if feature not in SUBJECT_KEYS:
+                    raise ValueError(f"{layout}: unknown model feature '{feature}'")
+                f = SUBJECT_KEYS.index(feature)
+                total = sum(weights.values())
+                for subject, weight in weights.items():
+                    self.weights[l, self.subject_index[subject_key(subject)], f] = weight / total
+                self.bias[l, f] = 0.0
+        # Stacked so layout l's block of rows starts at l * n_subjects
+        self._flat_weights = self.weights.reshape(n_layouts * n_subjects, n_features)
+
+    def layout_codes(self, layouts):
+        try:
+            return np.array([self.layout_index[layout] for layout in layouts], dtype=np.intp)
+        except KeyError as e:
+            raise ValueError(f"Unknown subject layout: {e.args[0]}") from None
+
+    def project(self, scores, codes):
+        # scores: (n, subjects) in self.subjects order, NaN where a subject is missing;
+        # codes: (n,) layout indices. Returns the (n, 7) model subject features.
+        scores = np.where(np.isnan(scores), self.default_score, scores)
+        n, n_subjects = scores.shape
+        one_hot = np.zeros((n, len(self.layouts)))
+        one_hot[np.arange(n), codes] = 1.0
+        # Each row's scores land in its own layout's block, so one product applies every layout
+        blocks = (one_hot[:, :, None] * scores[:, None, :]).reshape(n, -1)
+        return blocks @ self._flat_weights + one_hot @ self.bias
+
+    def score_matrix(self, rows):
+        # [{subject_key: score}, ...] -> (n, subjects) with NaN for missing subjects
+        scores = np.full((len(rows), len(self.subjects)), np.nan)
+        for i, row in enumerate(rows):
+            for subject, value in row.items():
+                j = self.subject_index.get(subject)
+                if j is not None and value is not None:
+                    scores[i, j] = value
+        return scores
+
+    def project_frame(self, df, layout_column='background'):
+        # DataFrame with subject-key columns -> (n, 7); absent columns count as missing
+        scores = np.full((len(df), len(self.subjects)), np.nan)
+        for j, subject in enumerate(self.subjects):
+            if subject in df.columns:
+                scores[:, j] = df[subject].to_numpy(dtype=np.float64)
+        return self.project(scores, self.layout_codes(df[layout_column]))
+
+
+MAPPING = SubjectMapping(FEATURE_MAPPING)
+
+
+def map_scores(layout, scores):
+    # {subject_key: score} for one student -> scores_dict with the 7 model subjects,
+    # total and average, through the same matrices as the bulk path
+    features = MAPPING.project(MAPPING.score_matrix([scores]), MAPPING.layout_codes([layout]))[0]
+    scores_dict = {feature: plain_number(value) for feature, value in zip(SUBJECT_KEYS, features)}
+    scores_dict['total'] = sum(scores_dict.values())
+    scores_dict['average'] = scores_dict['total'] / len(SUBJECT_KEYS)
+    return scores_dict
+
+
+def map_frame(df, background_column='background'):
+    return MAPPING.project_frame(df, background_column)
+
+
+def plain_number(number):
+    # 85.0 -> 85, so whole-number scores are saved the way the wizard's sliders produce them
+    number = float(number)
+    return int(number) if number.is_integer() else number
@@ -0,0 +1,11 @@
+from catalog import get_catalog
+
+# Subject names the wizards ask for. Kept free of heavy imports so the apps can
+# build their first page without loading NumPy; subject_mapping.py re-exports them.
+
+# Subject names by background (the subjects app_new.py asks for in step 8), from catalog.json
+subjects_by_background = {name: background.subjects for name, background in get_catalog().backgrounds.items()}
+
+# app.py asks every student for the model's own 7 subjects instead
+MODEL_LAYOUT = 'Model subjects'
+MODEL_SUBJECTS = ['Math', 'History', 'Physics', 'Chemistry', 'Biology', 'English', 'Geography']
@@ -0,0 +1,67 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from fast_forest import NumpyScaler
+
+# Multinomial logistic stand-in for the forest, fitted by distill.py on the
+# forest's own probabilities. Predicting is one small matrix product and a
+# softmax, so a single student takes microseconds. degree=2 adds the pairwise
+# products of the scaled features, which lets a linear model follow the
+# forest's interactions more closely.
+
+FORMAT_VERSION = 1
+
+
+@lru_cache(maxsize=None)
+def _pairs(n_features):
+    return np.triu_indices(n_features)
+
+
+def expand(X, degree):
+    if degree == 1:
+        return X
+    i, j = _pairs(X.shape[1])
+    return np.hstack([X, X[:, i] * X[:, j]])
+
+
+def softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    np.exp(logits, out=logits)
+    return logits / logits.sum(axis=1, keepdims=True)
+
+
+class LinearSurrogate:
+    def __init__(self, coef, intercept, classes, degree=1):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.degree = int(degree)
+        self.n_estimators = 1
+
+    def predict_proba(self, X):
+        # X is already scaled, like the forest's input
+        return softmax(expand(np.asarray(X, dtype=np.float64), self.degree) @ self.coef + self.intercept)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def save_surrogate(path, scaler, surrogate):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, scaler_mean=np.asarray(scaler.mean_, dtype=np.float64),
+                 scaler_scale=np.asarray(scaler.scale_, dtype=np.float64),
+                 coef=surrogate.coef, intercept=surrogate.intercept, classes=surrogate.classes_,
+                 degree=np.asarray(surrogate.degree), format_version=np.asarray(FORMAT_VERSION))
+    os.replace(tmp, path)
+
+
+def load_surrogate(path):
+    with np.load(path, allow_pickle=False) as data:
+        if int(data['format_version']) != FORMAT_VERSION:
+            raise ValueError(f"Unsupported surrogate format in {path}")
+        scaler = NumpyScaler(data['scaler_mean'], data['scaler_scale'])
+        surrogate = LinearSurrogate(data['coef'], data['intercept'], data['classes'], int(data['degree']))
+    return scaler, surrogate
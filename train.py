@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.ensemble import AdaBoostClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import GaussianNB
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+
+from model_registry import MODEL_DIR
+from recommender import FEATURE_COLUMNS, SCORES_SCHEMA, build_feature_matrix, class_names
+
+# SMOTE and XGBoost are optional, as in the notebook's requirements
+try:
+    from imblearn.over_sampling import SMOTE
+    _has_smote = True
+except ImportError:
+    _has_smote = False
+
+try:
+    from xgboost import XGBClassifier
+    _has_xgboost = True
+except ImportError:
+    _has_xgboost = False
+
+DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Jupiter file & dataset', 'student-scores.csv')
+
+
+def candidate_models(seed, forest_jobs=None):
+    # The notebook's classifiers; the forest is the one the app serves
+    models = {
+        'random_forest': lambda: RandomForestClassifier(random_state=seed, n_jobs=forest_jobs),
+        'logistic_regression': lambda: LogisticRegression(max_iter=1000),
+        'svc': lambda: SVC(probability=True, random_state=seed),
+        'knn': lambda: KNeighborsClassifier(),
+        'decision_tree': lambda: DecisionTreeClassifier(random_state=seed),
+        'gaussian_nb': lambda: GaussianNB(),
+        'adaboost': lambda: AdaBoostClassifier(random_state=seed),
+        'gradient_boosting': lambda: GradientBoostingClassifier(random_state=seed),
+    }
+    if _has_xgboost:
+        models['xgboost'] = lambda: XGBClassifier(eval_metric='mlogloss', random_state=seed, n_jobs=1)
+    return models
+
+
+def load_dataset(path=DATASET):
+    # Same 13 features the app builds; labels are indices into recommender.class_names
+    # so predict_proba columns line up with the names the app displays.
+    df = pd.read_csv(path)
+    unknown = set(df['career_aspiration']) - set(class_names)
+    if unknown:
+        raise ValueError(f"Careers missing from class_names: {sorted(unknown)}")
+    X = build_feature_matrix(df, SCORES_SCHEMA)
+    y = df['career_aspiration'].map({name: i for i, name in enumerate(class_names)}).to_numpy()
+    return X, y
+
+
+def prepare_data(X, y, seed, test_size=0.2, smote=True):
+    # Split first and oversample only the training part, so the test set stays untouched
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=seed, stratify=y)
+    if smote:
+        if not _has_smote:
+            raise RuntimeError("SMOTE needs imbalanced-learn: pip install imbalanced-learn (or pass --no-smote)")
+        X_train, y_train = SMOTE(random_state=seed).fit_resample(X_train, y_train)
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X_train)
+    X_test = scaler.transform(X_test)
+    return scaler, X_train, X_test, y_train, y_test
+
+
+def fit_candidate(name, factory, X_train, y_train, X_test, y_test):
+    model = factory()
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    y_pred = model.predict(X_test)
+    metrics = {
+        'accuracy': float(accuracy_score(y_test, y_pred)),
+        'f1_macro': float(f1_score(y_test, y_pred, average='macro')),
+        'fit_seconds': round(fit_seconds, 3),
+    }
+    return name, model, metrics
+
+
+def fit_candidates(names, factories, X_train, y_train, X_test, y_test, n_jobs=-1):
+    # Each candidate is fitted in its own worker process
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(fit_candidate)(name, factories[name], X_train, y_train, X_test, y_test) for name in names
+    )
+    return {name: (model, metrics) for name, model, metrics in results}
+
+
+def _atomic_dump(obj, path):
+    # Write then rename, so the app's model registry never loads a half-written file
+    tmp = path + '.tmp'
+    joblib.dump(obj, tmp)
+    os.replace(tmp, path)
+
+
+def save_artifacts(model_dir, scaler, model, manifest):
+    os.makedirs(model_dir, exist_ok=True)
+    _atomic_dump(model, os.path.join(model_dir, 'model.pkl'))
+    _atomic_dump(scaler, os.path.join(model_dir, 'scaler.pkl'))
+    tmp = os.path.join(model_dir, 'manifest.json.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(model_dir, 'manifest.json'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the career recommendation model.")
+    parser.add_argument('--data', default=DATASET, help="Path to student-scores.csv")
+    parser.add_argument('--model-dir', default=MODEL_DIR, help="Where to write scaler.pkl, model.pkl and manifest.json")
+    parser.add_argument('--models', help="Comma-separated candidates to fit (default: all available)")
+    parser.add_argument('--select', default='random_forest',
+                        help="Candidate to save, or 'best' for the highest test accuracy")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Parallel candidate fits (-1 = all cores)")
+    parser.add_argument('--forest-jobs', type=int, default=None, help="n_jobs for the RandomForest itself")
+    parser.add_argument('--no-smote', action='store_true', help="Skip SMOTE oversampling")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--export-forest', action='store_true',
+                        help="Also write forest.npz and the memory-mappable forest/ directory")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    factories = candidate_models(args.seed, args.forest_jobs)
+    names = args.models.split(',') if args.models else list(factories)
+    unknown = [name for name in names if name not in factories]
+    if unknown:
+        raise SystemExit(f"Unknown models: {unknown}. Available: {sorted(factories)}")
+
+    print(f"Loading {args.data}...")
+    X, y = load_dataset(args.data)
+    scaler, X_train, X_test, y_train, y_test = prepare_data(X, y, args.seed, smote=not args.no_smote)
+    print(f"Fitting {len(names)} candidates on {len(X_train)} rows (n_jobs={args.n_jobs})...")
+    results = fit_candidates(names, factories, X_train, y_train, X_test, y_test, args.n_jobs)
+
+    for name, (_, metrics) in sorted(results.items(), key=lambda item: -item[1][1]['accuracy']):
+        print(f"  {name:<20} accuracy {metrics['accuracy']:.4f}  f1 {metrics['f1_macro']:.4f}  "
+              f"fit {metrics['fit_seconds']:.2f}s")
+
+    selected = max(results, key=lambda name: results[name][1]['accuracy']) if args.select == 'best' else args.select
+    if selected not in results:
+        raise SystemExit(f"Selected model '{selected}' was not fitted")
+    model = results[selected][0]
+
+    manifest = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'model': selected,
+        'model_class': type(model).__name__,
+        'feature_order': FEATURE_COLUMNS,
+        'class_names': class_names,
+        'metrics': {name: metrics for name, (_, metrics) in results.items()},
+        'training_seconds': round(time.perf_counter() - started, 3),
+        'train_rows': int(len(X_train)),
+        'test_rows': int(len(X_test)),
+        'smote': not args.no_smote,
+        'seed': args.seed,
+        'sklearn_version': sklearn.__version__,
+        'numpy_version': np.__version__,
+    }
+    save_artifacts(args.model_dir, scaler, model, manifest)
+    print(f"Saved {selected} to {args.model_dir} ({manifest['training_seconds']:.1f}s total)")
+
+    if args.export_forest:
+        if not isinstance(model, RandomForestClassifier):
+            raise SystemExit("--export-forest needs a RandomForest model")
+        from fast_forest import export_model, export_model_dir
+        export_model(scaler, model, os.path.join(args.model_dir, 'forest.npz'))
+        export_model_dir(scaler, model, os.path.join(args.model_dir, 'forest'))
+        print(f"Exported forest.npz and forest/ to {args.model_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+from joblib import Memory
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from model_registry import MODEL_DIR
+from recommender import FEATURE_COLUMNS, class_names
+from train import DATASET, load_dataset, prepare_data, save_artifacts
+
+# Successive halving over RandomForest hyperparameters. Each round scores the
+# surviving candidates on a larger sample of the training data and keeps the best
+# 1/factor of them by an objective that trades accuracy against predict_proba
+# latency. Every (candidate, sample size, fold) accuracy is cached on disk, so
+# re-running the search only fits what has not been fitted before. Latency is
+# machine- and load-dependent, so it is never cached: each round times one
+# freshly fitted fold per candidate.
+
+PARAM_SPACE = {
+    'n_estimators': [10, 25, 50, 100, 200, 300],
+    'max_depth': [None, 4, 6, 8, 10, 12, 16, 20, 30],
+    'min_samples_leaf': [1, 2, 4, 8, 16],
+}
+CACHE_DIR = os.path.join(MODEL_DIR, '.tune_cache')
+
+
+def sample_candidates(n_candidates, seed):
+    rng = np.random.default_rng(seed)
+    seen = set()
+    candidates = []
+    total = math.prod(len(values) for values in PARAM_SPACE.values())
+    while len(candidates) < min(n_candidates, total):
+        params = {name: values[rng.integers(len(values))] for name, values in PARAM_SPACE.items()}
+        key = tuple(sorted(params.items(), key=lambda item: item[0]))
+        if key not in seen:
+            seen.add(key)
+            candidates.append({name: (None if value is None else int(value)) for name, value in params.items()})
+    return candidates
+
+
+def measure_latency(model, X, repeats=30):
+    # Median wall time of a single-row predict_proba, the app's hot path
+    row = X[:1]
+    model.predict_proba(row)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def fit_fold(params, X, y, train_idx, seed, smote):
+    X_train, y_train = X[train_idx], y[train_idx]
+    smallest = int(np.bincount(y_train)[np.unique(y_train)].min())
+    if smote and smallest > 1:
+        from imblearn.over_sampling import SMOTE
+        # Small early-round samples may have fewer than 6 rows in a class
+        k = min(5, smallest - 1)
+        X_train, y_train = SMOTE(random_state=seed, k_neighbors=k).fit_resample(X_train, y_train)
+    scaler = StandardScaler().fit(X_train)
+    model = RandomForestClassifier(random_state=seed, n_jobs=1, **params)
+    model.fit(scaler.transform(X_train), y_train)
+    return scaler, model
+
+
+def evaluate_fold(params, X, y, train_idx, test_idx, seed, smote):
+    # Cached with joblib.Memory; arguments are hashed, so changing data or params refits
+    scaler, model = fit_fold(params, X, y, train_idx, seed, smote)
+    return float((model.predict(scaler.transform(X[test_idx])) == y[test_idx]).mean())
+
+
+def fold_latency(params, X, y, train_idx, test_idx, seed, smote):
+    scaler, model = fit_fold(params, X, y, train_idx, seed, smote)
+    return measure_latency(model, scaler.transform(X[test_idx]))
+
+
+def count_rounds(n_candidates, factor):
+    # 1 + floor(log_factor(n)) in integers; math.log(243, 3) is 4.999...
+    rounds = 1
+    while n_candidates >= factor:
+        n_candidates //= factor
+        rounds += 1
+    return rounds
+
+
+def objective(accuracy, latency, latency_weight):
+    return accuracy - latency_weight * latency * 1000.0
+
+
+def successive_halving(X, y, candidates, memory, factor=3, min_resources=400, cv=3, seed=42,
+                       smote=True, latency_weight=0.01, log=print):
+    evaluate = memory.cache(evaluate_fold)
+    n_rounds = count_rounds(len(candidates), factor)
+    history = []
+    alive = list(range(len(candidates)))
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(X))
+
+    for round_no in range(n_rounds):
+        n_samples = min(len(X), int(min_resources * factor ** round_no))
+        if round_no == n_rounds - 1:
+            n_samples = len(X)
+        subset = np.sort(order[:n_samples])
+        folds = list(StratifiedKFold(cv, shuffle=True, random_state=seed).split(X[subset], y[subset]))
+
+        scored = []
+        for i in alive:
+            accuracy = float(np.mean([evaluate(candidates[i], X, y, subset[train], subset[test], seed, smote)
+                                      for train, test in folds]))
+            latency = fold_latency(candidates[i], X, y, subset[folds[0][0]], subset[folds[0][1]], seed, smote)
+            score = objective(accuracy, latency, latency_weight)
+            scored.append((score, i))
+            history.append({'round': round_no, 'n_samples': n_samples, 'params': candidates[i],
+                            'cv_accuracy': accuracy, 'latency_ms': latency * 1000.0, 'objective': score})
+
+        scored.sort(reverse=True)
+        log(f"Round {round_no}: {len(alive)} candidates on {n_samples} rows, "
+            f"best objective {scored[0][0]:.4f} {candidates[scored[0][1]]}")
+        alive = [i for _, i in scored[:max(1, len(scored) // factor)]]
+    return alive, history
+
+
+def pareto_front(points):
+    # Points sorted by latency; a point is kept if it beats every faster point on accuracy
+    front = []
+    best_accuracy = -1.0
+    for point in sorted(points, key=lambda p: (p['latency_ms'], -p['test_accuracy'])):
+        if point['test_accuracy'] > best_accuracy:
+            front.append(point)
+            best_accuracy = point['test_accuracy']
+    return front
+
+
+def fit_final(params, X_train, y_train, X_test, y_test, seed):
+    import pickle
+
+    model = RandomForestClassifier(random_state=seed, n_jobs=1, **params).fit(X_train, y_train)
+    accuracy = float((model.predict(X_test) == y_test).mean())
+    return {
+        'test_accuracy': accuracy,
+        'latency_ms': measure_latency(model, X_test) * 1000.0,
+        'model_mb': len(pickle.dumps(model)) / 1e6,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the RandomForest for accuracy vs latency.")
+    parser.add_argument('--data', default=DATASET)
+    parser.add_argument('--candidates', type=int, default=27)
+    parser.add_argument('--factor', type=int, default=3)
+    parser.add_argument('--min-resources', type=int, default=400, help="Training rows in the first round")
+    parser.add_argument('--cv', type=int, default=3)
+    parser.add_argument('--latency-weight', type=float, default=0.01,
+                        help="Accuracy points traded for each millisecond of predict_proba latency")
+    parser.add_argument('--finalists', type=int, default=9,
+                        help="Top candidates (by objective at their last round) refitted for the Pareto report")
+    parser.add_argument('--target-accuracy', type=float, help="Recommend the fastest model reaching this test accuracy")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--report', default=os.path.join(MODEL_DIR, 'tuning_report.json'))
+    parser.add_argument('--save', action='store_true', help="Save the recommended model to --model-dir")
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--no-smote', action='store_true')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    memory = Memory(args.cache_dir, verbose=0)
+    smote = not args.no_smote
+    X, y = load_dataset(args.data)
+    # Hold out the same test split train.py uses; the search only sees the rest
+    X_search, _, y_search, _ = train_test_split(X, y, test_size=0.2, random_state=args.seed, stratify=y)
+
+    candidates = sample_candidates(args.candidates, args.seed)
+    _, history = successive_halving(X_search, y_search, candidates, memory, args.factor, args.min_resources,
+                                    args.cv, args.seed, smote, args.latency_weight)
+
+    # Last (largest-sample) result per candidate, best objective first
+    last = {}
+    for entry in history:
+        last[json.dumps(entry['params'], sort_keys=True)] = entry
+    finalists = sorted(last.values(), key=lambda e: -e['objective'])[:args.finalists]
+
+    scaler, X_train, X_test, y_train, y_test = prepare_data(X, y, args.seed, smote=smote)
+    # Not cached: the report's latencies are measured on this run
+    points = []
+    for entry in finalists:
+        result = fit_final(entry['params'], X_train, y_train, X_test, y_test, args.seed)
+        points.append(dict(params=entry['params'], **result))
+    front = pareto_front(points)
+
+    recommended = None
+    if args.target_accuracy is not None:
+        meeting = [p for p in front if p['test_accuracy'] >= args.target_accuracy]
+        recommended = meeting[0] if meeting else None
+    else:
+        recommended = max(points, key=lambda p: objective(p['test_accuracy'], p['latency_ms'] / 1000.0,
+                                                          args.latency_weight))
+
+    print("\nPareto front (test accuracy vs single-row predict_proba latency):")
+    for p in front:
+        marker = '  <- recommended' if p is recommended else ''
+        print(f"  accuracy {p['test_accuracy']:.4f}  latency {p['latency_ms']:.2f} ms  "
+              f"size {p['model_mb']:.1f} MB  {p['params']}{marker}")
+    if args.target_accuracy is not None and recommended is None:
+        print(f"No finalist reaches accuracy {args.target_accuracy}")
+
+    report = {
+        'latency_weight': args.latency_weight,
+        'target_accuracy': args.target_accuracy,
+        'search_seconds': round(time.perf_counter() - started, 3),
+        'rounds': history,
+        'finalists': points,
+        'pareto_front': front,
+        'recommended': recommended,
+    }
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.report}")
+
+    if args.save and recommended:
+        model = RandomForestClassifier(random_state=args.seed, **recommended['params']).fit(X_train, y_train)
+        save_artifacts(args.model_dir, scaler, model, {
+            'model': 'random_forest', 'model_class': type(model).__name__, 'params': recommended['params'],
+            'feature_order': FEATURE_COLUMNS, 'class_names': class_names,
+            'metrics': {'random_forest': {'accuracy': recommended['test_accuracy'],
+                                          'latency_ms': recommended['latency_ms']}},
+            'smote': smote,
+            'seed': args.seed,
+            'source': 'tune.py',
+        })
+        print(f"Saved recommended model to {args.model_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())